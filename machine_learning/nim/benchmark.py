@@ -0,0 +1,104 @@
+"""
+Benchmark of the Nim trainers.
+
+    python3 benchmark.py [--games 10000] [--trainers serial batch parallel]
+                         [--workers 2 4] [--sync 1000] [--seed 0]
+
+Every trainer trains an AI from `--games` games, and reports how many games
+it played per second and how optimal the trained AI plays: the fraction of
+the winning positions in which it makes a winning move.
+"""
+
+import argparse
+import contextlib
+import functools
+import io
+import itertools
+import random
+import time
+
+from nim import train, train_batch, train_parallel
+
+TRAINERS = ["serial", "batch", "parallel"]
+
+INITIAL = (1, 3, 5, 7)
+
+
+@functools.lru_cache(maxsize=None)
+def winning(piles):
+    """
+    Returns whether the player to move at `piles` can force a win. The
+    player who takes the last object loses, so with no objects left the
+    player to move has won.
+    """
+    if not any(piles):
+        return True
+    return any(
+        not winning(piles[:i] + (pile - count,) + piles[i + 1:])
+        for i, pile in enumerate(piles)
+        for count in range(1, pile + 1)
+    )
+
+
+def optimality(ai):
+    """
+    Returns the fraction of winning positions in which the best action of
+    `ai` leaves the opponent in a losing position.
+    """
+    positions = 0
+    optimal = 0
+    for piles in itertools.product(*[range(pile + 1) for pile in INITIAL]):
+        if not any(piles) or not winning(piles):
+            continue
+        pile, count = ai.choose_action(list(piles), epsilon=False)
+        after = list(piles)
+        after[pile] -= count
+        positions += 1
+        optimal += not winning(tuple(after))
+    return optimal / positions
+
+
+def timed(function, *args, **kwargs):
+    """
+    Returns the result of calling `function`, with its output discarded,
+    and the seconds it took.
+    """
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument("--games", type=int, default=10000)
+    parser.add_argument("--trainers", nargs="+", choices=TRAINERS,
+                        default=TRAINERS)
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4])
+    parser.add_argument("--sync", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{args.games} games")
+    for trainer in args.trainers:
+        if trainer == "serial":
+            random.seed(args.seed)
+            runs = [("serial", lambda: train(args.games, backend="dense"))]
+        elif trainer == "batch":
+            runs = [("batch", lambda: train_batch(args.games,
+                                                  seed=args.seed))]
+        else:
+            runs = [
+                (f"parallel, workers={workers}",
+                 functools.partial(train_parallel, args.games, workers,
+                                   args.sync, seed=args.seed))
+                for workers in args.workers
+            ]
+        for name, run in runs:
+            ai, seconds = timed(run)
+            print(f"    {name:22} {args.games / seconds:10.0f} games/s, "
+                  f"{optimality(ai):6.1%} optimal")
+
+
+if __name__ == "__main__":
+    main()
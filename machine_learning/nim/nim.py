@@ -1,6 +1,23 @@
+import functools
 import math
+import mmap
+import os
 import random
+import struct
+import sys
 import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+# most states whose available actions are kept
+ACTIONS_CACHE_SIZE = 4096
+
+# Q-table files start with the magic, the version, the number of piles,
+# alpha, epsilon and the number of games learned from, then the initial
+# piles, padded to 8 bytes, then the little-endian Q-values of the table
+MAGIC = b"NIMQ"
+VERSION = 1
+HEADER = struct.Struct("<4sHHddQ")
 
 
 class Nim():
@@ -25,12 +42,11 @@ class Nim():
 
         Action `(i, j)` represents the action of removing `j` items
         from pile `i` (where piles are 0-indexed).
+
+        The actions are returned as a tuple, which is computed once per
+        state and shared by every caller, so it must not be modified.
         """
-        actions = set()
-        for i, pile in enumerate(piles):
-            for j in range(1, pile + 1):
-                actions.add((i, j))
-        return actions
+        return actions_of(tuple(piles))
 
     @classmethod
     def other_player(cls, player):
@@ -70,9 +86,72 @@ class Nim():
             self.winner = self.player
 
 
+@functools.lru_cache(maxsize=ACTIONS_CACHE_SIZE)
+def actions_of(piles):
+    """
+    Returns the available actions of the tuple of piles `piles`, in the
+    order of iterating over a set of them.
+    """
+    actions = set()
+    for i, pile in enumerate(piles):
+        for j in range(1, pile + 1):
+            actions.add((i, j))
+    return tuple(actions)
+
+
+class QTable():
+    """
+    Q-values of every state and action of the games starting from the
+    piles `initial`, in one flat array of doubles.
+
+    A state is numbered by reading its piles as the digits of a mixed-radix
+    number, where pile i has base `initial[i] + 1`, so [1, 3, 5, 7] has
+    2 * 4 * 6 * 8 = 384 states. Action (i, j) is number
+    `offsets[i] + j - 1`, so it has 1 + 3 + 5 + 7 = 16 actions, and the
+    Q-value of a state and an action is at `state * actions + action`.
+    """
+
+    def __init__(self, initial):
+        self.initial = list(initial)
+        self.strides = []
+        stride = 1
+        for pile in reversed(self.initial):
+            self.strides.insert(0, stride)
+            stride *= pile + 1
+        self.states = stride
+        self.offsets = []
+        self.actions = 0
+        for pile in self.initial:
+            self.offsets.append(self.actions)
+            self.actions += pile
+        self.values = array("d", [0.0]) * (self.states * self.actions)
+
+    def __len__(self):
+        return len(self.values)
+
+    def state_index(self, state):
+        """Returns the position of the first Q-value of `state`."""
+        index = 0
+        for pile, stride in zip(state, self.strides):
+            index += pile * stride
+        return index * self.actions
+
+    def action_index(self, action):
+        pile, count = action
+        return self.offsets[pile] + count - 1
+
+    def get(self, state, action):
+        return self.values[self.state_index(state) + self.action_index(action)]
+
+    def set(self, state, action, value):
+        self.values[self.state_index(state) + self.action_index(action)] = \
+            value
+
+
 class NimAI():
 
-    def __init__(self, alpha=0.5, epsilon=0.1):
+    def __init__(self, alpha=0.5, epsilon=0.1, backend="dict",
+                 initial=[1, 3, 5, 7]):
         """
         Initialize AI with an empty Q-learning dictionary,
         an alpha (learning) rate, and an epsilon rate.
@@ -84,10 +163,82 @@ class NimAI():
 
         we usually represent state as a list, since lists can’t be used as Python dictionary keys,
         we’ll instead use a tuple version of the state when getting or setting values in self.q.
+
+        With `backend="dense"`, `self.q` is instead a `QTable` holding
+        the Q-value of every state reachable from the piles `initial`,
+        so that looking one up is index arithmetic. Both backends learn
+        exactly the same values.
         """
-        self.q = dict()
+        if backend == "dict":
+            self.q = dict()
+        elif backend == "dense":
+            self.q = QTable(initial)
+        else:
+            raise ValueError(f"unknown backend {backend}")
+        self.dense = backend == "dense"
+        self.initial = list(initial)
         self.alpha = alpha
         self.epsilon = epsilon
+        # number of training games learned from
+        self.games = 0
+
+    def save(self, path):
+        """
+        Write the Q-table, the configuration and the number of games
+        learned from to a file at `path`. The file is replaced only once
+        it is completely written.
+        """
+        table = self.q
+        if not self.dense:
+            table = QTable(self.initial)
+            for (state, action), value in self.q.items():
+                table.set(state, action, value)
+        values = array("d", table.values.tobytes())
+        if sys.byteorder != "little":
+            values.byteswap()
+        header = HEADER.pack(MAGIC, VERSION, len(self.initial), self.alpha,
+                             self.epsilon, self.games)
+        piles = struct.pack(f"<{len(self.initial)}I", *self.initial)
+        padding = -(len(header) + len(piles)) % 8
+        temporary = f"{path}.tmp"
+        with open(temporary, "wb") as file:
+            file.write(header + piles + bytes(padding))
+            values.tofile(file)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Return the AI saved at `path`, with a dense Q-table. The Q-values
+        are memory-mapped rather than read, and training the AI further
+        changes them in memory only. Raises ValueError if the file is not
+        a complete Q-table of this version.
+        """
+        with open(path, "rb") as file:
+            header = file.read(HEADER.size)
+            if len(header) < HEADER.size or header[:4] != MAGIC:
+                raise ValueError(f"not a Nim Q-table file: {path}")
+            _, version, count, alpha, epsilon, games = HEADER.unpack(header)
+            if version != VERSION:
+                raise ValueError(f"unsupported Q-table version {version}")
+            piles = file.read(4 * count)
+            if len(piles) < 4 * count:
+                raise ValueError(f"Q-table file has the wrong size: {path}")
+            initial = list(struct.unpack(f"<{count}I", piles))
+            ai = cls(alpha=alpha, epsilon=epsilon, backend="dense",
+                     initial=initial)
+            ai.games = games
+            start = HEADER.size + 4 * count
+            start += -start % 8
+            if os.fstat(file.fileno()).st_size != start + 8 * len(ai.q):
+                raise ValueError(f"Q-table file has the wrong size: {path}")
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+        if sys.byteorder == "little":
+            ai.q.values = memoryview(data)[start:].cast("d")
+        else:
+            ai.q.values = array("d", data[start:])
+            ai.q.values.byteswap()
+        return ai
 
     def update(self, old_state, action, new_state, reward):
         """
@@ -104,6 +255,8 @@ class NimAI():
         Return the Q-value for the state `state` and the action `action`.
         If no Q-value exists yet in `self.q`, return 0.
         """
+        if self.dense:
+            return self.q.get(state, action)
         q_value = self.q.get((tuple(state), action))
         if (tuple(state), action) in self.q:
             return q_value
@@ -128,7 +281,10 @@ class NimAI():
         new_q_value = old_q + self.alpha * \
             ((reward + future_rewards) - old_q)
         # update the dictionary
-        self.q[(tuple(state), action)] = new_q_value
+        if self.dense:
+            self.q.set(state, action, new_q_value)
+        else:
+            self.q[(tuple(state), action)] = new_q_value
 
     def best_future_reward(self, state):
         """
@@ -143,6 +299,14 @@ class NimAI():
 
         best_reward = 0
         actions = Nim.available_actions(state)
+        if self.dense:
+            values = self.q.values
+            base = self.q.state_index(state)
+            offsets = self.q.offsets
+            for pile, count in actions:
+                best_reward = max(values[base + offsets[pile] + count - 1],
+                                  best_reward)
+            return best_reward
         for action in actions:
             best_reward = max(self.get_q_value(state, action), best_reward)
         return best_reward
@@ -167,9 +331,19 @@ class NimAI():
         actions = Nim.available_actions(state)
         # if epsilon is true
         if epsilon and random.random() <= self.epsilon:
-            return random.choice(list(actions))
+            return random.choice(actions)
         # else:
         best_reward = -math.inf
+        if self.dense:
+            values = self.q.values
+            base = self.q.state_index(state)
+            offsets = self.q.offsets
+            for action in actions:
+                q_value = values[base + offsets[action[0]] + action[1] - 1]
+                if q_value > best_reward:
+                    best_reward = q_value
+                    best_action = action
+            return best_action
         for action in actions:
 
             # get the q value for the action
@@ -181,17 +355,51 @@ class NimAI():
         return best_action
 
 
-def train(n):
+def train(n, backend="dict", checkpoint=None, every=1000):
     """
     Train an AI by playing `n` games against itself.
+    `backend` is the Q-table backend of the AI, "dict" or "dense".
+
+    If `checkpoint` is a path, the AI is saved there every `every` games
+    and at the end, and training resumes from the AI saved there, if
+    any, until it has learned from `n` games in all. A checkpoint that
+    cannot be loaded is ignored, and overwritten once training saves.
     """
 
-    player = NimAI()
+    player = None
+    if checkpoint is not None and os.path.exists(checkpoint):
+        try:
+            player = NimAI.load(checkpoint)
+            print(f"Resuming after training game {player.games}")
+        except ValueError as error:
+            print(f"Training from scratch: {error}")
+    if player is None:
+        player = NimAI(backend=backend)
+    while player.games < n:
+        games = n - player.games
+        if checkpoint is not None:
+            games = min(games, every)
+        self_play(player, games, verbose=True)
+        if checkpoint is not None:
+            player.save(checkpoint)
+    print("Done training")
+
+    # Return the trained AI
+    return player
+
+
+def self_play(player, n, verbose=False):
+    """
+    Let the AI `player` learn from `n` games against itself, printing
+    every game if `verbose`.
+    """
 
     # Play n games
     for i in range(n):
-        print(f"Playing training game {i + 1}")
-        game = Nim()
+        player.games += 1
+        if verbose:
+            print(f"Playing training game {player.games}")
+        game = Nim(player.initial)
 
         # Keep track of last move made by either player
         last = {
@@ -234,9 +442,171 @@ def train(n):
                     0
                 )
 
+
+def train_parallel(n, workers=4, sync=1000, alpha=0.5, epsilon=0.1,
+                   initial=[1, 3, 5, 7], seed=None):
+    """
+    Train an AI by playing `n` games against itself on `workers`
+    processes, and return it with a dense Q-table.
+
+    Training goes in rounds: every worker starts from a copy of the
+    Q-table, learns from `sync` games of its own, and sends its table
+    back, and the tables of the workers are averaged into the Q-table
+    of the next round, each weighted by the number of games it learned
+    from, since the last worker of the last round may play fewer.
+    """
+    player = NimAI(alpha=alpha, epsilon=epsilon, backend="dense",
+                   initial=initial)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        played = 0
+        rounds = 0
+        while played < n:
+            games = [min(sync, max(0, n - played - k * sync))
+                     for k in range(workers)]
+            games = [count for count in games if count]
+            snapshot = player.q.values.tobytes()
+            tables = executor.map(
+                learn,
+                [(alpha, epsilon, initial, snapshot, count,
+                  None if seed is None else f"{seed} {rounds} {k}")
+                 for k, count in enumerate(games)]
+            )
+            tables = [array("d", table) for table in tables]
+            total = sum(games)
+            player.q.values = array("d", [
+                sum(value * count for value, count in zip(values, games))
+                / total
+                for values in zip(*tables)
+            ])
+            played += total
+            rounds += 1
+    player.games = played
     print("Done training")
+    return player
 
-    # Return the trained AI
+
+def learn(task):
+    """
+    Plays the games of a worker of `train_parallel` from a snapshot of
+    the Q-table, and returns the learned Q-table.
+    """
+    alpha, epsilon, initial, snapshot, games, seed = task
+    random.seed(seed)
+    player = NimAI(alpha=alpha, epsilon=epsilon, backend="dense",
+                   initial=initial)
+    player.q.values = array("d", snapshot)
+    self_play(player, games)
+    return player.q.values.tobytes()
+
+
+def train_batch(n, batch=1024, alpha=0.5, epsilon=0.1, initial=[1, 3, 5, 7],
+                seed=None):
+    """
+    Train an AI by playing `n` games against itself, `batch` of them at
+    a time in lockstep with NumPy arrays, and return it with a dense
+    Q-table.
+
+    Every step makes one epsilon-greedy move in each running game and
+    updates the Q-values like `train` does, except that the updates of
+    one step are made together: when several games update the same
+    state and action, its Q-value moves towards the mean of their new
+    value estimates. Finished games are replaced by new ones until `n`
+    have been played.
+    """
+
+    # NumPy is only needed by this trainer
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    player = NimAI(alpha=alpha, epsilon=epsilon, backend="dense",
+                   initial=initial)
+    table = player.q
+    states, actions = table.states, table.actions
+
+    # pile and count of every action, and piles of every state
+    pile_of = np.repeat(np.arange(len(initial)), initial)
+    count_of = np.concatenate([np.arange(1, pile + 1) for pile in initial])
+    strides = np.array(table.strides)
+    radices = np.array(initial) + 1
+    piles = np.arange(states)[:, None] // strides % radices
+
+    # valid actions and the state they lead to; the empty state is 0
+    valid = piles[:, pile_of] >= count_of
+    following = np.arange(states)[:, None] - count_of * strides[pile_of]
+    following[~valid] = 0
+    start = table.state_index(initial) // actions
+
+    q = np.zeros(states * actions)
+    q_view = q.reshape(states, actions)
+
+    def best_future(state):
+        values = np.where(valid[state], q_view[state], -np.inf)
+        return np.maximum(values.max(axis=1), 0)
+
+    def update(index, targets):
+        # average the targets of every (state, action) index
+        sums = np.bincount(index, weights=targets, minlength=q.size)
+        counts = np.bincount(index, minlength=q.size)
+        seen = counts > 0
+        q[seen] += alpha * (sums[seen] / counts[seen] - q[seen])
+
+    games = min(batch, n)
+    started = games
+    finished = 0
+    state = np.full(games, start)
+    running = np.ones(games, dtype=bool)
+    # last state and action index of each player in each game, -1 if none
+    last = np.full((2, games), -1)
+    turn = np.zeros(games, dtype=int)
+    rows = np.arange(games)
+
+    while finished < n:
+        ids = rows[running]
+        s = state[ids]
+
+        # epsilon-greedy: a uniformly random valid action, or the best one
+        explore = rng.random(len(ids)) <= epsilon
+        scores = np.where(valid[s], q_view[s], -np.inf)
+        noise = np.where(valid[s], rng.random((len(ids), actions)), -1)
+        scores[explore] = noise[explore]
+        a = scores.argmax(axis=1)
+
+        new = following[s, a]
+        done = new == 0
+        future = best_future(new)
+        mover = turn[ids]
+        other = 1 - mover
+        index = s * actions + a
+        previous = last[other, ids]
+
+        # the move that ends a game loses, the other player's last move
+        # wins, and other moves are rewarded once the next move is made
+        waiting = previous >= 0
+        reward = np.where(done, 1.0, 0.0)
+        update(
+            np.concatenate([index[done], previous[waiting]]),
+            np.concatenate([future[done] - 1,
+                            reward[waiting] + future[waiting]])
+        )
+
+        last[mover, ids] = index
+        turn[ids] = other
+        state[ids] = new
+
+        # replace finished games while there are games left to start
+        ended = ids[done]
+        finished += len(ended)
+        restart = ended[:max(0, min(len(ended), n - started))]
+        started += len(restart)
+        running[ended] = False
+        running[restart] = True
+        state[restart] = start
+        last[:, restart] = -1
+        turn[restart] = 0
+
+    table.values = array("d", q.tobytes())
+    player.games = n
+    print("Done training")
     return player
 
 
@@ -1,4 +1,7 @@
+import os
+
 from nim import train, play
 
-ai = train(10000)
+# the AI is trained once and saved next to this script, later games load it
+ai = train(10000, checkpoint=os.path.join(os.path.dirname(__file__), "nim.q"))
 play(ai)
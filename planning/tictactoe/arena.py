@@ -0,0 +1,229 @@
+"""
+Headless arena that plays batches of games between two agents.
+
+    python3 arena.py AGENT AGENT [--games N] [--workers W] [-m M -n N -k K]
+
+Agents are given as `random`, `minimax` (exhaustive search), `depth:D`
+(search D plies deep), `time:S` (search S seconds per move), `mcts:P`
+(Monte Carlo Tree Search with P playouts per move) or `lookup` (table of
+optimal moves, 3x3 tic-tac-toe only). The agents swap sides
+every game. Each game is written as one line `game,x,o,winner,moves,seconds`
+as soon as it is finished, followed by a summary.
+"""
+
+import argparse
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import mcts
+import mnk
+from tictactoe import X, O
+
+
+class RandomAgent():
+    """Plays a random legal move."""
+
+    def __init__(self):
+        self.name = "random"
+
+    def move(self, board, rng):
+        return rng.choice(sorted(mnk.actions(board)))
+
+
+class MinimaxAgent():
+    """Plays the move of the m,n,k search, within the given limits."""
+
+    def __init__(self, name, time_limit=None, max_depth=None):
+        self.name = name
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+
+    def move(self, board, rng):
+        return mnk.minimax(board, self.time_limit, self.max_depth)
+
+
+class MCTSAgent():
+    """Plays the move of Monte Carlo Tree Search with a playout budget."""
+
+    def __init__(self, name, iterations):
+        self.name = name
+        self.iterations = iterations
+        self.engine = None
+
+    def new_game(self, seed):
+        # a new tree for every game, seeded from the game alone, so that
+        # results do not depend on which games a process played before
+        self.engine = mcts.MCTS(seed)
+
+    def move(self, board, rng):
+        move, stats = self.engine.search(board, self.iterations, None)
+        return move
+
+
+# value and best move of every 3x3 position, built once per process
+lookup_table = dict()
+
+
+class LookupAgent():
+    """Looks up an optimal move for the position in a precomputed table."""
+
+    def __init__(self):
+        self.name = "lookup"
+
+    def move(self, board, rng):
+        if (board.m, board.n, board.k) != (3, 3, 3):
+            raise ValueError("lookup agent only plays 3x3 tic-tac-toe")
+        if not lookup_table:
+            solve(mnk.initial_state())
+        value, move = lookup_table[key(board)]
+        return move
+
+
+def key(board):
+    return tuple(cell for row in board.cells for cell in row)
+
+
+def solve(board):
+    """
+    Returns the value of `board` for X, filling `lookup_table` with the
+    value and best move of every position reachable from it.
+    """
+    if mnk.terminal(board):
+        return mnk.utility(board)
+    position = key(board)
+    if position not in lookup_table:
+        maximize = mnk.player(board) == X
+        best_value = None
+        best_move = None
+        for action in sorted(mnk.actions(board)):
+            value = solve(mnk.result(board, action))
+            if best_value is None or (value > best_value if maximize
+                                      else value < best_value):
+                best_value = value
+                best_move = action
+        lookup_table[position] = (best_value, best_move)
+    return lookup_table[position][0]
+
+
+def make_agent(spec):
+    """
+    Returns the agent described by `spec`, e.g. "random" or "depth:2".
+    """
+    name, _, arg = spec.partition(":")
+    if name == "random":
+        return RandomAgent()
+    elif name == "minimax":
+        return MinimaxAgent(spec)
+    elif name == "depth":
+        return MinimaxAgent(spec, max_depth=int(arg))
+    elif name == "time":
+        return MinimaxAgent(spec, time_limit=float(arg))
+    elif name == "lookup":
+        return LookupAgent()
+    elif name == "mcts":
+        return MCTSAgent(spec, int(arg or 1000))
+    raise ValueError(f"unknown agent {spec}")
+
+
+def play_game(game, agent_x, agent_o, m, n, k, seed):
+    """
+    Plays one game and returns its record:
+    (game, x, o, winner, moves, seconds), where winner is "-" for a draw.
+    """
+    # everything random in the game is seeded from `seed` and `game`
+    rng = random.Random(f"{seed} {game}")
+    agents = {X: agent_x, O: agent_o}
+    for side, agent in agents.items():
+        if hasattr(agent, "new_game"):
+            agent.new_game(f"{seed} {game} {side}")
+    board = mnk.initial_state(m, n, k)
+    start = time.perf_counter()
+    while not mnk.terminal(board):
+        move = agents[mnk.player(board)].move(board, rng)
+        board = mnk.result(board, move)
+    seconds = time.perf_counter() - start
+    return (game, agent_x.name, agent_o.name, mnk.winner(board) or "-",
+            board.moves, seconds)
+
+
+def play_games(args):
+    """Plays a chunk of games in a worker process."""
+    return [play_game(*game) for game in args]
+
+
+def arena(first, second, games, m=3, n=3, k=3, workers=1, seed=0,
+          chunk=50):
+    """
+    Plays `games` games between the agent specs `first` and `second`,
+    which swap sides every game, split over `workers` processes.
+    Yields the record of each game, in order.
+    """
+    agent_a = make_agent(first)
+    agent_b = make_agent(second)
+    jobs = []
+    for game in range(games):
+        x, o = (agent_a, agent_b) if game % 2 == 0 else (agent_b, agent_a)
+        jobs.append((game, x, o, m, n, k, seed))
+    chunks = [jobs[i:i + chunk] for i in range(0, len(jobs), chunk)]
+
+    if workers == 1:
+        for records in map(play_games, chunks):
+            yield from records
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for records in executor.map(play_games, chunks):
+            yield from records
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play batches of m,n,k-games between two agents.")
+    parser.add_argument("first")
+    parser.add_argument("second")
+    parser.add_argument("-g", "--games", type=int, default=100)
+    parser.add_argument("-w", "--workers", type=int, default=1)
+    parser.add_argument("-m", "--rows", type=int, default=3)
+    parser.add_argument("-n", "--cols", type=int, default=3)
+    parser.add_argument("-k", "--in-a-row", type=int, default=3)
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument("-q", "--quiet", action="store_true",
+                        help="only print the summary")
+    args = parser.parse_args()
+    if args.games < 1:
+        parser.error("--games must be at least 1")
+
+    wins = {args.first: 0, args.second: 0}
+    draws = 0
+    moves = 0
+    start = time.perf_counter()
+    for record in arena(args.first, args.second, args.games, args.rows,
+                        args.cols, args.in_a_row, args.workers, args.seed):
+        game, x, o, winner, length, seconds = record
+        if not args.quiet:
+            print(f"{game},{x},{o},{winner},{length},{seconds:.6f}")
+        if winner == X:
+            wins[x] += 1
+        elif winner == O:
+            wins[o] += 1
+        else:
+            draws += 1
+        moves += length
+    elapsed = time.perf_counter() - start
+
+    games = args.games
+    print(f"{games} games in {elapsed:.2f}s, "
+          f"{moves / elapsed:.1f} moves/s", file=sys.stderr)
+    if args.first == args.second:
+        print(f"    wins {wins[args.first] / games:.1%}, "
+              f"draws {draws / games:.1%}", file=sys.stderr)
+    else:
+        for agent in wins:
+            print(f"    {agent} wins {wins[agent] / games:.1%}",
+                  file=sys.stderr)
+        print(f"    draws {draws / games:.1%}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
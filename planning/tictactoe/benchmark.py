@@ -0,0 +1,230 @@
+"""
+Benchmarks for the tic-tac-toe engines.
+
+    python3 benchmark.py solve [--engine tictactoe|mnk]
+    python3 benchmark.py parallel [--depth D] [--workers 1 2 4 8]
+"""
+
+import argparse
+import functools
+import statistics
+import sys
+import time
+import tracemalloc
+
+import mnk
+import tictactoe as ttt
+
+# the 8 lines of a 3x3 board, as indices into a flat tuple of 9 cells
+LINES = [
+    (0, 1, 2), (3, 4, 5), (6, 7, 8),
+    (0, 3, 6), (1, 4, 7), (2, 5, 8),
+    (0, 4, 8), (2, 4, 6),
+]
+
+# (m, n, k, opening moves) of the positions searched by the benchmarks
+POSITIONS = [
+    (5, 5, 4, [(2, 2), (1, 1)]),
+    (6, 6, 4, [(2, 2), (3, 3), (2, 3)]),
+    (7, 7, 4, [(3, 3), (2, 2), (3, 2), (4, 4)]),
+]
+
+
+def position(m, n, k, opening):
+    board = mnk.initial_state(m, n, k)
+    for move in opening:
+        board = mnk.result(board, move)
+    return board
+
+
+def line_winner(cells):
+    for a, b, c in LINES:
+        if cells[a] is not None and cells[a] == cells[b] == cells[c]:
+            return cells[a]
+    return None
+
+
+def to_move(cells):
+    return ttt.X if cells.count(ttt.X) == cells.count(ttt.O) else ttt.O
+
+
+@functools.lru_cache(maxsize=None)
+def value(cells):
+    """
+    Value of a flat 3x3 position for X (1 win, 0 draw, -1 loss), by plain
+    minimax without any pruning. Independent of the engines under test.
+    """
+    won = line_winner(cells)
+    if won is not None:
+        return 1 if won == ttt.X else -1
+    if None not in cells:
+        return 0
+    mark = to_move(cells)
+    values = [
+        value(cells[:i] + (mark,) + cells[i + 1:])
+        for i in range(9) if cells[i] is None
+    ]
+    return max(values) if mark == ttt.X else min(values)
+
+
+def reachable_positions():
+    """
+    Returns every non-terminal position reachable from the empty board,
+    as flat tuples of 9 cells.
+    """
+    start = (None,) * 9
+    seen = {start}
+    frontier = [start]
+    while frontier:
+        cells = frontier.pop()
+        if line_winner(cells) is not None or None not in cells:
+            continue
+        mark = to_move(cells)
+        for i in range(9):
+            if cells[i] is None:
+                child = cells[:i] + (mark,) + cells[i + 1:]
+                if child not in seen:
+                    seen.add(child)
+                    frontier.append(child)
+    return sorted(
+        (cells for cells in seen
+         if line_winner(cells) is None and None in cells),
+        key=lambda cells: (9 - cells.count(None), str(cells))
+    )
+
+
+def tictactoe_search(cells):
+    board = [list(cells[i:i + 3]) for i in (0, 3, 6)]
+    return ttt.search(board)
+
+
+def mnk_search(cells):
+    board = mnk.initial_state()
+    # alternate the stones, so that moves and hash are kept up to date
+    xs = [i for i in range(9) if cells[i] == ttt.X]
+    os = [i for i in range(9) if cells[i] == ttt.O]
+    for i in range(len(xs)):
+        board.place(divmod(xs[i], 3))
+        if i < len(os):
+            board.place(divmod(os[i], 3))
+    return mnk.search(board, time_limit=None)
+
+
+ENGINES = {
+    "tictactoe": tictactoe_search,
+    "mnk": mnk_search,
+}
+
+
+def solve(engine):
+    """
+    Searches every reachable position with `engine` and checks that the
+    move it returns keeps the value of the position. Reports throughput
+    and the memory allocated by `tictactoe.result`.
+    """
+    positions = reachable_positions()
+    search = ENGINES[engine]
+    print(f"{len(positions)} reachable non-terminal positions, "
+          f"engine {engine}")
+
+    failures = 0
+    nodes = 0
+    times = []
+    for cells in positions:
+        start = time.perf_counter()
+        move, stats = search(cells)
+        times.append(time.perf_counter() - start)
+        nodes += stats.nodes
+
+        i, j = move
+        mark = to_move(cells)
+        child = cells[:3 * i + j] + (mark,) + cells[3 * i + j + 1:]
+        if cells[3 * i + j] is not None or value(child) != value(cells):
+            failures += 1
+            print(f"    not optimal: {move} in {cells}")
+
+    total = sum(times)
+    print(f"    {failures} positions with a suboptimal move")
+    print(f"    total {total:.3f}s, {len(positions) / total:.1f} positions/s, "
+          f"{nodes} states, {nodes / total:.0f} states/s")
+    print(f"    per position: min {min(times) * 1000:.3f}ms, "
+          f"median {statistics.median(times) * 1000:.3f}ms, "
+          f"max {max(times) * 1000:.3f}ms")
+
+    # time and memory cost of the deep copy in result
+    board = ttt.initial_state()
+    calls = 1000
+    start = time.perf_counter()
+    for _ in range(calls):
+        ttt.result(board, (1, 1))
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    boards = [ttt.result(board, (1, 1)) for _ in range(calls)]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    tictactoe_search((None,) * 9)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del boards
+    print(f"    result: {elapsed / calls * 1e6:.1f}us per call, "
+          f"{(after - before) / calls:.0f} bytes kept per board, "
+          f"peak {(peak - current) / 1024:.1f} KiB above baseline "
+          f"while solving the empty board")
+    return failures == 0
+
+
+def parallel(depth, workers):
+    """
+    Times a fixed-depth search of every position with each worker count,
+    and checks that the parallel searches agree with the serial value.
+    """
+    ok = True
+    for m, n, k, opening in POSITIONS:
+        board = position(m, n, k, opening)
+        print(f"{m}x{n}, {k} in a row, depth {depth}")
+        serial = None
+        for count in workers:
+            # start the pool up front, its start up is not search time
+            if count > 1:
+                mnk.process_pool(count)
+            search = mnk.Search(board, max_depth=depth, workers=count)
+            start = time.perf_counter()
+            move = search.run()
+            elapsed = time.perf_counter() - start
+            if serial is None:
+                serial = (search.score, elapsed)
+            same = search.score == serial[0]
+            ok = ok and same
+            print(f"    {count} workers: {elapsed:7.3f}s "
+                  f"{search.stats.nodes:9} nodes "
+                  f"speedup {serial[1] / elapsed:5.2f} "
+                  f"move {move} value {search.score}"
+                  f"{'' if same else ' MISMATCH'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser(
+        "solve", help="correctness and speed over all reachable positions")
+    command.add_argument("--engine", choices=ENGINES, default="tictactoe")
+
+    command = commands.add_parser(
+        "parallel", help="speedup of the parallel m,n,k search")
+    command.add_argument("--depth", type=int, default=5)
+    command.add_argument("--workers", type=int, nargs="+",
+                         default=[1, 2, 4, 8])
+
+    args = parser.parse_args()
+    if args.command == "solve":
+        ok = solve(args.engine)
+    elif args.command == "parallel":
+        ok = parallel(args.depth, args.workers)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+"""
+Monte Carlo Tree Search (UCT) player for m,n,k-games.
+
+Same `minimax(board)` interface as `tictactoe.py` and `mnk.py`, for boards
+too large to search exhaustively.
+"""
+
+import math
+import random
+import time
+from array import array
+
+from tictactoe import X, O, EMPTY, SearchStats
+
+# exploration constant of UCT
+EXPLORATION = math.sqrt(2)
+
+# the tree is thrown away once it holds this many nodes
+MAX_NODES = 2_000_000
+
+# check the clock once every this many playouts
+CLOCK_INTERVAL = 64
+
+# compact cell values
+MARKS = {EMPTY: 0, X: 1, O: 2}
+
+
+class Tree():
+    """
+    Search tree stored in flat arrays indexed by node number, instead of
+    one Python object per node. The children of a node are created all at
+    once and are numbered consecutively from `first_child`.
+    """
+
+    def __init__(self):
+        self.parent = array("i")
+        self.move = array("i")
+        # player (1 or 2) who made the move into the node
+        self.player = array("b")
+        self.first_child = array("i")
+        self.child_count = array("i")
+        self.visits = array("i")
+        # games won by the player who made the move into the node,
+        # a draw counts as half a win
+        self.wins = array("d")
+
+    def __len__(self):
+        return len(self.parent)
+
+    def add(self, parent, move, player=0):
+        self.parent.append(parent)
+        self.move.append(move)
+        self.player.append(player)
+        self.first_child.append(-1)
+        self.child_count.append(0)
+        self.visits.append(0)
+        self.wins.append(0.0)
+        return len(self.parent) - 1
+
+    def expand(self, node, moves, player):
+        self.first_child[node] = len(self.parent)
+        self.child_count[node] = len(moves)
+        for move in moves:
+            self.add(node, move, player)
+
+    def children(self, node):
+        first = self.first_child[node]
+        return range(first, first + self.child_count[node])
+
+
+class MCTS():
+    """
+    Monte Carlo Tree Search on a compact board: a bytearray with one byte
+    per cell (0 empty, 1 X, 2 O).
+
+    The tree is kept between searches. When the next position is the root
+    plus the moves played since, the subtree below those moves is reused.
+    """
+
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+        self.tree = None
+        self.root = None
+        self.cells = None
+        self.shape = None
+
+    def reset(self, cells, shape):
+        self.tree = Tree()
+        self.root = self.tree.add(-1, -1)
+        self.cells = cells
+        self.shape = shape
+
+    def reuse(self, cells, shape):
+        """
+        Moves the root down to `cells` if it follows from the current root,
+        otherwise starts a new tree. `shape` is the (m, n, k) of the game.
+        """
+        if self.tree is None or len(self.tree) > MAX_NODES \
+                or shape != self.shape:
+            return self.reset(cells, shape)
+        played = [i for i in range(len(cells)) if cells[i] != self.cells[i]]
+        if any(self.cells[i] for i in played):
+            return self.reset(cells, shape)
+
+        # replay the new stones in turn order, starting with the mover
+        mover = 1 if self.cells.count(1) == self.cells.count(2) else 2
+        ours = [i for i in played if cells[i] == mover]
+        theirs = [i for i in played if cells[i] != mover]
+        if len(ours) - len(theirs) not in (0, 1):
+            return self.reset(cells, shape)
+        path = []
+        for i in range(len(ours)):
+            path.append(ours[i])
+            if i < len(theirs):
+                path.append(theirs[i])
+        # the order is only known for at most one move of each player
+        if len(path) > 2:
+            return self.reset(cells, shape)
+
+        tree = self.tree
+        node = self.root
+        for move in path:
+            for child in tree.children(node):
+                if tree.move[child] == move:
+                    node = child
+                    break
+            else:
+                return self.reset(cells, shape)
+        self.root = node
+        self.cells = cells
+
+    def search(self, board, iterations=None, time_limit=1.0, cancel=None):
+        """
+        Runs playouts from `board` until `iterations` playouts are done or
+        `time_limit` seconds have passed, and returns the most visited move
+        together with the `SearchStats` of the search.
+        """
+        m = len(board)
+        n = len(board[0])
+        k = getattr(board, "k", 3)
+        cells = bytearray(MARKS[board[i][j]]
+                          for i in range(m) for j in range(n))
+        self.reuse(cells, (m, n, k))
+        lines = rays(m, n, k)
+
+        stats = SearchStats()
+        start = time.perf_counter()
+        deadline = None if time_limit is None else start + time_limit
+        playouts = 0
+        while iterations is None or playouts < iterations:
+            self.playout(lines, k)
+            playouts += 1
+            if playouts % CLOCK_INTERVAL == 0:
+                if cancel is not None and cancel.is_set():
+                    break
+                if deadline is not None \
+                        and time.perf_counter() >= deadline:
+                    break
+        stats.elapsed = time.perf_counter() - start
+        stats.nodes = playouts
+
+        # report the most visited line of play
+        tree = self.tree
+        node = self.root
+        line = []
+        while tree.child_count[node]:
+            node = max(tree.children(node), key=tree.visits.__getitem__)
+            if not tree.visits[node]:
+                break
+            line.append(divmod(tree.move[node], n))
+        stats.principal_variation = line
+        stats.expanded = sum(1 for count in tree.child_count if count)
+        stats.children = len(tree) - 1
+        return (line[0] if line else None), stats
+
+    def playout(self, lines, k):
+        """
+        Selects a leaf by UCT, expands it, plays randomly to the end of the
+        game and updates the statistics of the nodes on the way.
+        """
+        tree = self.tree
+        visits = tree.visits
+        wins = tree.wins
+        move_of = tree.move
+        rng = self.rng
+        cells = bytearray(self.cells)
+        mover = 1 if cells.count(1) == cells.count(2) else 2
+        empty = cells.count(0)
+
+        # selection
+        node = self.root
+        winner = 0
+        while tree.child_count[node] and not winner and empty:
+            log_visits = math.log(visits[node] or 1)
+            best = -1.0
+            for child in tree.children(node):
+                if not visits[child]:
+                    node = child
+                    break
+                score = wins[child] / visits[child] + EXPLORATION * \
+                    math.sqrt(log_visits / visits[child])
+                if score > best:
+                    best = score
+                    choice = child
+            else:
+                node = choice
+            move = move_of[node]
+            cells[move] = mover
+            empty -= 1
+            if wins_at(cells, lines, move, k):
+                winner = mover
+            mover = 3 - mover
+
+        # expansion
+        if not winner and empty:
+            moves = [i for i in range(len(cells)) if not cells[i]]
+            tree.expand(node, moves, mover)
+            node = tree.first_child[node] + rng.randrange(len(moves))
+            move = move_of[node]
+            cells[move] = mover
+            empty -= 1
+            if wins_at(cells, lines, move, k):
+                winner = mover
+            mover = 3 - mover
+
+        # simulation
+        if not winner and empty:
+            moves = [i for i in range(len(cells)) if not cells[i]]
+            rng.shuffle(moves)
+            for move in moves:
+                cells[move] = mover
+                if wins_at(cells, lines, move, k):
+                    winner = mover
+                    break
+                mover = 3 - mover
+
+        # backpropagation up to the root
+        player = tree.player
+        parent = tree.parent
+        root = self.root
+        while True:
+            visits[node] += 1
+            if not winner:
+                wins[node] += 0.5
+            elif winner == player[node]:
+                wins[node] += 1
+            if node == root:
+                break
+            node = parent[node]
+
+
+def rays(m, n, k):
+    """
+    Returns, for every cell of an m x n board, the cells to walk in each
+    direction when looking for k in a row through it.
+    """
+    if (m, n, k) not in ray_cache:
+        lines = []
+        for i in range(m):
+            for j in range(n):
+                cell = []
+                for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    for step in (1, -1):
+                        ray = []
+                        y, x = i + step * di, j + step * dj
+                        while 0 <= y < m and 0 <= x < n \
+                                and len(ray) < k - 1:
+                            ray.append(y * n + x)
+                            y += step * di
+                            x += step * dj
+                        cell.append(ray)
+                lines.append(cell)
+        ray_cache[m, n, k] = lines
+    return ray_cache[m, n, k]
+
+
+ray_cache = dict()
+
+
+def wins_at(cells, lines, move, k):
+    """
+    Returns True if the stone on `move` completes k in a row.
+    """
+    mark = cells[move]
+    ray = lines[move]
+    # rays come in pairs of opposite directions
+    for d in range(0, 8, 2):
+        length = 1
+        for cell in ray[d]:
+            if cells[cell] != mark:
+                break
+            length += 1
+        for cell in ray[d + 1]:
+            if cells[cell] != mark:
+                break
+            length += 1
+        if length >= k:
+            return True
+    return False
+
+
+# engine of `minimax`, so that successive moves reuse the tree
+engine = MCTS()
+
+
+def search(board, iterations=None, time_limit=1.0, cancel=None):
+    """
+    Returns the best action for the current player on the board, together
+    with the `SearchStats` of the search. `stats.nodes` is the number of
+    playouts, so `stats.nodes_per_second` is the playouts per second.
+    """
+    if board_over(board):
+        return None, SearchStats()
+    return engine.search(board, iterations, time_limit, cancel)
+
+
+def minimax(board, iterations=None, time_limit=1.0, cancel=None,
+            verbose=False):
+    """
+    Returns the best action for the current player on the board, by
+    Monte Carlo Tree Search within `iterations` playouts or `time_limit`
+    seconds. `cancel` can be a `threading.Event` that stops the search.
+    With `verbose`, the statistics of the search are printed.
+    """
+    move, stats = search(board, iterations, time_limit, cancel)
+    if verbose:
+        print(stats)
+    return move
+
+
+def board_over(board):
+    """
+    Returns True if the game on `board` is over.
+    """
+    m = len(board)
+    n = len(board[0])
+    k = getattr(board, "k", 3)
+    cells = bytearray(MARKS[board[i][j]]
+                      for i in range(m) for j in range(n))
+    if not cells.count(0):
+        return True
+    lines = rays(m, n, k)
+    return any(cells[i] and wins_at(cells, lines, i, k)
+               for i in range(len(cells)))
@@ -0,0 +1,610 @@
+"""
+Generalized m,n,k-game player (tic-tac-toe, 4x4, gomoku, ...)
+
+Same API as `tictactoe.py`, but on an m x n board where k in a row wins.
+"""
+
+import math
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+
+from tictactoe import X, O, EMPTY, SearchStats
+
+# directions of a line through a cell: row, column, diagonal, anti-diagonal
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+# score of a won position, minus the number of stones on the board
+# so that faster wins (and slower losses) are preferred
+WIN = 10 ** 9
+
+# boards bigger than this only consider cells close to existing stones
+NEIGHBOURHOOD_AREA = 25
+NEIGHBOURHOOD = 2
+
+# check the clock once every this many nodes
+CLOCK_INTERVAL = 128
+
+# seconds between two looks at `cancel` while waiting for workers
+CANCEL_INTERVAL = 0.05
+
+# kinds of transposition table entries
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# parallel workers only exchange table entries searched at least this deep
+SHARE_DEPTH = 2
+
+# random keys per board size and cell, for incremental Zobrist hashing
+zobrist_keys = dict()
+
+
+def zobrist(m, n):
+    """
+    Returns the Zobrist keys of an m x n board: one random 64 bit number
+    per cell and player. The keys are seeded by the board size, so every
+    process hashes boards the same way.
+    """
+    if (m, n) not in zobrist_keys:
+        rng = random.Random(m * 1000 + n)
+        zobrist_keys[m, n] = [
+            [{X: rng.getrandbits(64), O: rng.getrandbits(64)}
+             for _ in range(n)]
+            for _ in range(m)
+        ]
+    return zobrist_keys[m, n]
+
+
+class Board():
+    """
+    An m x n board on which k in a row wins.
+
+    Rows are exposed by indexing, so `board[i][j]` works like on the
+    list-of-lists boards of `tictactoe.py`. The board also keeps track of
+    the number of stones played and the winner, which are updated
+    incrementally around each new stone instead of rescanning the board,
+    and the Zobrist hash of the position.
+    """
+
+    def __init__(self, m=3, n=3, k=3):
+        self.m = m
+        self.n = n
+        self.k = k
+        self.cells = [[EMPTY] * n for _ in range(m)]
+        self.moves = 0
+        self.won = None
+        self.keys = zobrist(m, n)
+        self.hash = 0
+
+    def __getitem__(self, i):
+        return self.cells[i]
+
+    def __len__(self):
+        return self.m
+
+    def __repr__(self):
+        return f"Board({self.m}, {self.n}, {self.k}, moves={self.moves})"
+
+    def copy(self):
+        board = Board.__new__(Board)
+        board.m, board.n, board.k = self.m, self.n, self.k
+        board.cells = [row.copy() for row in self.cells]
+        board.moves = self.moves
+        board.won = self.won
+        board.keys = self.keys
+        board.hash = self.hash
+        return board
+
+    def place(self, action):
+        """
+        Puts the stone of the player to move on `action`, in place.
+        Does not validate the move.
+        """
+        i, j = action
+        mark = X if self.moves % 2 == 0 else O
+        self.cells[i][j] = mark
+        self.moves += 1
+        self.hash ^= self.keys[i][j][mark]
+        if self.line_length(i, j) >= self.k:
+            self.won = mark
+
+    def undo(self, action):
+        """
+        Takes back the stone on `action`, in place.
+        """
+        i, j = action
+        self.hash ^= self.keys[i][j][self.cells[i][j]]
+        self.cells[i][j] = EMPTY
+        self.moves -= 1
+        self.won = None
+
+    def line_length(self, i, j):
+        """
+        Returns the longest line of equal stones going through (i, j).
+        """
+        cells = self.cells
+        mark = cells[i][j]
+        longest = 0
+        for di, dj in DIRECTIONS:
+            length = 1
+            # walk forward, then backward from the cell
+            for step in (1, -1):
+                y, x = i + step * di, j + step * dj
+                while 0 <= y < self.m and 0 <= x < self.n \
+                        and cells[y][x] == mark:
+                    length += 1
+                    y += step * di
+                    x += step * dj
+            longest = max(longest, length)
+        return longest
+
+
+def initial_state(m=3, n=3, k=3):
+    """
+    Returns starting state of an m x n board where k in a row wins.
+    """
+    if k > max(m, n):
+        raise ValueError("k in a row does not fit on the board")
+    return Board(m, n, k)
+
+
+def player(board):
+    """
+    Returns player who has the next turn on a board.
+    """
+    if terminal(board):
+        return None
+    return X if board.moves % 2 == 0 else O
+
+
+def actions(board):
+    """
+    Returns set of all possible actions (i, j) available on the board.
+    """
+    return {
+        (i, j)
+        for i in range(board.m)
+        for j in range(board.n)
+        if board.cells[i][j] == EMPTY
+    }
+
+
+def result(board, action):
+    """
+    Returns the board that results from making move (i, j) on the board.
+    """
+    i, j = action
+    if terminal(board) or not (0 <= i < board.m and 0 <= j < board.n) \
+            or board.cells[i][j] != EMPTY:
+        raise Exception('This is not a valid move.')
+    board_copy = board.copy()
+    board_copy.place(action)
+    return board_copy
+
+
+def winner(board):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    return board.won
+
+
+def terminal(board):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    return board.won is not None or board.moves == board.m * board.n
+
+
+def utility(board):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    if board.won == X:
+        return 1
+    elif board.won == O:
+        return -1
+    return 0
+
+
+def evaluate(board):
+    """
+    Heuristic value of a non-terminal board from X's point of view.
+
+    Every window of k cells in a line that holds stones of only one player
+    can still become a win for that player, and counts more the fuller it is.
+    """
+    m, n, k = board.m, board.n, board.k
+    cells = board.cells
+    score = 0
+    for di, dj in DIRECTIONS:
+        for i in range(m):
+            # the last cell of the window must still be on the board
+            if not 0 <= i + (k - 1) * di < m:
+                continue
+            for j in range(n):
+                if not 0 <= j + (k - 1) * dj < n:
+                    continue
+                xs = os = 0
+                for step in range(k):
+                    mark = cells[i + step * di][j + step * dj]
+                    if mark == X:
+                        xs += 1
+                    elif mark == O:
+                        os += 1
+                if xs and not os:
+                    score += 4 ** xs
+                elif os and not xs:
+                    score -= 4 ** os
+    return score
+
+
+def candidates(board):
+    """
+    Returns the cells worth searching on the board.
+
+    On small boards these are all empty cells. On large boards only cells
+    within `NEIGHBOURHOOD` of a stone are considered (or the centre cell
+    on an empty board), which keeps the branching factor manageable.
+    """
+    m, n = board.m, board.n
+    cells = board.cells
+    if m * n <= NEIGHBOURHOOD_AREA:
+        return [(i, j) for i in range(m) for j in range(n)
+                if cells[i][j] == EMPTY]
+    if board.moves == 0:
+        return [(m // 2, n // 2)]
+    near = set()
+    for i in range(m):
+        for j in range(n):
+            if cells[i][j] == EMPTY:
+                continue
+            for y in range(max(0, i - NEIGHBOURHOOD),
+                           min(m, i + NEIGHBOURHOOD + 1)):
+                for x in range(max(0, j - NEIGHBOURHOOD),
+                               min(n, j + NEIGHBOURHOOD + 1)):
+                    if cells[y][x] == EMPTY:
+                        near.add((y, x))
+    return list(near)
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the time budget is used up
+    or the search has been cancelled."""
+
+
+class Search():
+    """
+    Iterative deepening negamax with alpha-beta pruning.
+
+    Moves are ordered by the transposition table or the best move of the
+    previous iteration, then killer moves (moves that caused a cutoff at
+    the same ply) and then the history heuristic (how often a move caused
+    cutoffs anywhere).
+
+    With more than one worker the moves at the root are split over a
+    process pool: the first move is searched here, and its value is the
+    bound for searching its younger brothers in parallel. Workers get the
+    deep entries of the transposition table and send theirs back, where
+    they are merged into this search's table. Workers also start from this
+    search's history heuristic.
+
+    Table entries are only used to cut off the search at exactly the depth
+    they were searched at, so a depth-limited search returns the same
+    value no matter the order or process in which moves were searched.
+    """
+
+    def __init__(self, board, time_limit=None, max_depth=None, cancel=None,
+                 workers=1):
+        # search works on its own copy, placing and undoing stones in place
+        self.board = board.copy()
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.cancel = cancel
+        self.workers = workers
+        self.deadline = None
+        self.stats = SearchStats()
+        self.score = None
+        self.table = dict()
+        self.killers = dict()
+        self.history = dict()
+
+    def run(self):
+        """
+        Returns the best move found within the time and depth limits.
+        """
+        board = self.board
+        remaining = board.m * board.n - board.moves
+        max_depth = remaining if self.max_depth is None \
+            else min(self.max_depth, remaining)
+
+        start = time.perf_counter()
+        best_move = None
+        for depth in range(1, max_depth + 1):
+            # always finish depth 1, so that there is a move to return
+            if depth > 1 and self.time_limit is not None:
+                self.deadline = start + self.time_limit
+            try:
+                if self.workers > 1 and depth > 1:
+                    score, move = self.root_parallel(depth, best_move)
+                else:
+                    score, move = self.root(depth, best_move)
+            except SearchTimeout:
+                break
+            best_move = move
+            self.score = score
+            self.stats.principal_variation = \
+                self.principal_variation(move, depth)
+            # a forced win or loss has been found, deeper search won't help
+            if abs(score) >= WIN - board.m * board.n:
+                break
+        self.stats.elapsed = time.perf_counter() - start
+        return best_move
+
+    def principal_variation(self, move, depth):
+        """
+        Returns the expected line of play after `move`, following the best
+        moves stored in the transposition table.
+        """
+        board = self.board
+        line = []
+        while move is not None and len(line) < depth:
+            line.append(move)
+            board.place(move)
+            if terminal(board):
+                break
+            entry = self.table.get(board.hash)
+            move = entry[3] if entry is not None else None
+        for move in reversed(line):
+            board.undo(move)
+        return line
+
+    def check_clock(self):
+        if self.cancel is not None and self.cancel.is_set():
+            raise SearchTimeout()
+        if self.deadline is not None \
+                and time.perf_counter() >= self.deadline:
+            raise SearchTimeout()
+
+    def ordered(self, moves, ply, first=None):
+        """
+        Sorts `moves` so that the most promising are searched first.
+        """
+        killers = self.killers.get(ply, ())
+        history = self.history
+        moves.sort(
+            key=lambda move: (move == first, move in killers,
+                              history.get(move, 0)),
+            reverse=True
+        )
+        return moves
+
+    def root(self, depth, first):
+        board = self.board
+        alpha = -math.inf
+        beta = math.inf
+        best_score = -math.inf
+        best_move = None
+        moves = self.ordered(candidates(board), 0, first)
+        self.stats.expanded += 1
+        self.stats.children += len(moves)
+        for move in moves:
+            board.place(move)
+            try:
+                score = -self.negamax(depth - 1, 1, -beta, -alpha)
+            finally:
+                board.undo(move)
+            if score > best_score:
+                best_score = score
+                best_move = move
+            alpha = max(alpha, score)
+        return best_score, best_move
+
+    def root_parallel(self, depth, first):
+        board = self.board
+        moves = self.ordered(candidates(board), 0, first)
+        self.stats.expanded += 1
+        self.stats.children += len(moves)
+
+        # the eldest brother is searched first, with a full window
+        eldest = moves[0]
+        board.place(eldest)
+        try:
+            best_score = -self.negamax(depth - 1, 1, -math.inf, math.inf)
+        finally:
+            board.undo(eldest)
+        best_move = eldest
+
+        # the younger brothers only have to beat it
+        shared = {
+            key: entry for key, entry in self.table.items()
+            if entry[0] >= SHARE_DEPTH
+        }
+        budget = None if self.deadline is None \
+            else self.deadline - time.perf_counter()
+        executor, stop = process_pool(self.workers)
+        stop.clear()
+        futures = [
+            executor.submit(search_subtree, result(board, move), depth - 1,
+                            best_score, budget, shared, self.history)
+            for move in moves[1:]
+        ]
+        try:
+            for move, future in zip(moves[1:], futures):
+                while not wait([future], timeout=CANCEL_INTERVAL).done:
+                    if self.cancel is not None and self.cancel.is_set():
+                        raise SearchTimeout()
+                score, stats, entries = future.result()
+                # the worker counts its plies from this root already
+                self.stats.merge(stats)
+                for key, entry in entries.items():
+                    if key not in self.table \
+                            or self.table[key][0] <= entry[0]:
+                        self.table[key] = entry
+                if score > best_score:
+                    best_score = score
+                    best_move = move
+        except SearchTimeout:
+            # stop the workers, and let them finish before the stop event
+            # is cleared again by the next search
+            stop.set()
+            for future in futures:
+                future.cancel()
+            wait(futures)
+            raise
+        return best_score, best_move
+
+    def negamax(self, depth, ply, alpha, beta):
+        """
+        Returns the value of the board for the player to move.
+        """
+        board = self.board
+        stats = self.stats
+        stats.nodes += 1
+        if stats.nodes % CLOCK_INTERVAL == 0:
+            self.check_clock()
+
+        # the previous player has just won
+        if board.won is not None:
+            return -(WIN - board.moves)
+        if board.moves == board.m * board.n:
+            return 0
+        if depth == 0:
+            sign = 1 if board.moves % 2 == 0 else -1
+            return sign * evaluate(board)
+
+        # look the position up in the transposition table
+        key = board.hash
+        entry = self.table.get(key)
+        first = None
+        if entry is not None:
+            entry_depth, kind, score, first = entry
+            if entry_depth == depth:
+                stats.tt_hits += 1
+                if kind == EXACT:
+                    return score
+                elif kind == LOWER:
+                    alpha = max(alpha, score)
+                else:
+                    beta = min(beta, score)
+                if alpha >= beta:
+                    return score
+        window_alpha = alpha
+
+        best_score = -math.inf
+        best_move = None
+        stats.expanded += 1
+        for move in self.ordered(candidates(board), ply, first):
+            stats.children += 1
+            board.place(move)
+            try:
+                score = -self.negamax(depth - 1, ply + 1, -beta, -alpha)
+            finally:
+                board.undo(move)
+            if score > best_score:
+                best_score = score
+                best_move = move
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                stats.cutoff(ply)
+                # remember the refutation for siblings at the same ply
+                killers = self.killers.setdefault(ply, [])
+                if move not in killers:
+                    killers.insert(0, move)
+                    del killers[2:]
+                break
+        if best_move is not None:
+            self.history[best_move] = \
+                self.history.get(best_move, 0) + depth * depth
+
+        if best_score <= window_alpha:
+            kind = UPPER
+        elif best_score >= beta:
+            kind = LOWER
+        else:
+            kind = EXACT
+        self.table[key] = (depth, kind, best_score, best_move)
+        return best_score
+
+
+# process pools of the parallel search and their stop events, by number
+# of workers, kept between moves
+executors = dict()
+
+# in a worker process: the stop event of its pool
+stop = None
+
+
+def process_pool(workers):
+    if workers not in executors:
+        event = multiprocessing.Event()
+        executor = ProcessPoolExecutor(max_workers=workers,
+                                       initializer=start_worker,
+                                       initargs=(event,))
+        executors[workers] = executor, event
+    return executors[workers]
+
+
+def start_worker(event):
+    global stop
+    stop = event
+
+
+def search_subtree(board, depth, alpha, budget, shared, history):
+    """
+    Searches a root move in a worker process of the parallel search.
+
+    Returns the value of the move for the player who made it (at most
+    `alpha` if it is not better than the best move so far), the statistics
+    of the search and the new deep transposition table entries.
+    """
+    # the search stops like on a timeout once the pool's stop event is set
+    search = Search(board, time_limit=budget, cancel=stop)
+    if budget is not None:
+        search.deadline = time.perf_counter() + budget
+    search.table.update(shared)
+    search.history.update(history)
+    score = -search.negamax(depth, 1, -math.inf, -alpha)
+    entries = {
+        key: entry for key, entry in search.table.items()
+        if entry[0] >= SHARE_DEPTH and shared.get(key) != entry
+    }
+    return score, search.stats, entries
+
+
+def search(board, time_limit=1.0, max_depth=None, cancel=None, workers=1):
+    """
+    Returns the best action for the current player on the board, together
+    with the `SearchStats` of the search. See `minimax` for the arguments.
+    """
+    if terminal(board):
+        return None, SearchStats()
+    engine = Search(board, time_limit, max_depth, cancel, workers)
+    move = engine.run()
+    return move, engine.stats
+
+
+def minimax(board, time_limit=1.0, max_depth=None, cancel=None, workers=1,
+            verbose=False):
+    """
+    Returns the best action for the current player on the board.
+
+    Searches deeper and deeper until `time_limit` seconds have passed,
+    `max_depth` plies are reached or the game is solved. With no limits
+    on a board of at most `NEIGHBOURHOOD_AREA` cells the search is
+    exhaustive and the returned move is optimal.
+
+    `cancel` can be a `threading.Event`; once it is set the search stops
+    early, like when it runs out of time. A parallel search also stops
+    its workers.
+
+    With `workers` above 1 the moves at the root are searched in parallel
+    by that many processes. The value of the chosen move is the same as
+    with a serial search to the same depth.
+
+    With `verbose`, the statistics of the search are printed.
+    """
+    move, stats = search(board, time_limit, max_depth, cancel, workers)
+    if verbose:
+        print(stats)
+    return move
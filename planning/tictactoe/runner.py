@@ -1,9 +1,52 @@
+import argparse
 import pygame
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 
+import mcts
+import mnk
 import tictactoe as ttt
 
+parser = argparse.ArgumentParser(description="Play m,n,k-games (tic-tac-toe, gomoku, ...) against the computer.")
+parser.add_argument("-m", "--rows", type=int, default=3)
+parser.add_argument("-n", "--cols", type=int, default=3)
+parser.add_argument("-k", "--in-a-row", type=int, default=3)
+parser.add_argument("-t", "--time", type=float, default=1.0,
+                    help="seconds the computer may think per move")
+parser.add_argument("-e", "--engine", choices=["minimax", "mcts"],
+                    default="minimax")
+args = parser.parse_args()
+
+# classic tic-tac-toe is solved exactly, other variants by the m,n,k engine
+# unless Monte Carlo Tree Search is asked for
+if args.engine == "mcts":
+    game = mnk
+
+    def new_board():
+        return mnk.initial_state(args.rows, args.cols, args.in_a_row)
+
+    def ai_move(board, cancel):
+        return mcts.minimax(board, time_limit=args.time, cancel=cancel)
+elif (args.rows, args.cols, args.in_a_row) == (3, 3, 3):
+    game = ttt
+
+    def new_board():
+        return ttt.initial_state()
+
+    def ai_move(board, cancel):
+        # fast enough to always run to the end
+        return ttt.minimax(board)
+else:
+    game = mnk
+
+    def new_board():
+        return mnk.initial_state(args.rows, args.cols, args.in_a_row)
+
+    def ai_move(board, cancel):
+        return mnk.minimax(board, time_limit=args.time, cancel=cancel)
+
 pygame.init()
 size = width, height = 600, 400
 
@@ -15,16 +58,29 @@ screen = pygame.display.set_mode(size)
 
 mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
-moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
+
+# Fit the board between the title and the bottom button
+tile_size = min(80, int(min((width - 40) / args.cols, (height - 150) / args.rows)))
+moveFont = pygame.font.Font("OpenSans-Regular.ttf", int(tile_size * 0.75))
+
+# The computer searches in a background thread, so that the window keeps
+# responding; the future is polled once per frame
+worker = ThreadPoolExecutor(max_workers=1)
+search = None
+cancel = None
+
+clock = pygame.time.Clock()
 
 user = None
-board = ttt.initial_state()
-ai_turn = False
+board = new_board()
 
 while True:
 
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            # don't wait for a running search to finish
+            if cancel is not None:
+                cancel.set()
             sys.exit()
 
     screen.fill(black)
@@ -67,19 +123,18 @@ while True:
     else:
 
         # Draw game board
-        tile_size = 80
-        tile_origin = (width / 2 - (1.5 * tile_size),
-                       height / 2 - (1.5 * tile_size))
+        tile_origin = (width / 2 - (args.cols / 2 * tile_size),
+                       height / 2 - (args.rows / 2 * tile_size))
         tiles = []
-        for i in range(3):
+        for i in range(args.rows):
             row = []
-            for j in range(3):
+            for j in range(args.cols):
                 rect = pygame.Rect(
                     tile_origin[0] + j * tile_size,
                     tile_origin[1] + i * tile_size,
                     tile_size, tile_size
                 )
-                pygame.draw.rect(screen, white, rect, 3)
+                pygame.draw.rect(screen, white, rect, 3 if tile_size >= 40 else 1)
 
                 if board[i][j] != ttt.EMPTY:
                     move = moveFont.render(board[i][j], True, white)
@@ -89,12 +144,12 @@ while True:
                 row.append(rect)
             tiles.append(row)
 
-        game_over = ttt.terminal(board)
-        player = ttt.player(board)
+        game_over = game.terminal(board)
+        player = game.player(board)
 
         # Show title
         if game_over:
-            winner = ttt.winner(board)
+            winner = game.winner(board)
             if winner is None:
                 title = f"Game Over: Tie."
             else:
@@ -102,7 +157,8 @@ while True:
         elif user == player:
             title = f"Play as {user}"
         else:
-            title = f"Computer thinking..."
+            dots = "." * (int(time.time() * 2) % 3 + 1)
+            title = f"Computer thinking{dots:<3}"
         title = largeFont.render(title, True, white)
         titleRect = title.get_rect()
         titleRect.center = ((width / 2), 30)
@@ -110,37 +166,41 @@ while True:
 
         # Check for AI move
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
+            if search is None:
+                cancel = threading.Event()
+                search = worker.submit(ai_move, board, cancel)
+            elif search.done():
+                move = search.result()
+                board = game.result(board, move)
+                search = None
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
         if click == 1 and user == player and not game_over:
             mouse = pygame.mouse.get_pos()
-            for i in range(3):
-                for j in range(3):
+            for i in range(args.rows):
+                for j in range(args.cols):
                     if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
-                        board = ttt.result(board, (i, j))
-
-        if game_over:
-            againButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
-            again = mediumFont.render("Play Again", True, black)
-            againRect = again.get_rect()
-            againRect.center = againButton.center
-            pygame.draw.rect(screen, white, againButton)
-            screen.blit(again, againRect)
-            click, _, _ = pygame.mouse.get_pressed()
-            if click == 1:
-                mouse = pygame.mouse.get_pos()
-                if againButton.collidepoint(mouse):
-                    time.sleep(0.2)
-                    user = None
-                    board = ttt.initial_state()
-                    ai_turn = False
+                        board = game.result(board, (i, j))
+
+        # Play Again is always available; it abandons a running search
+        againButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
+        again = mediumFont.render("Play Again", True, black)
+        againRect = again.get_rect()
+        againRect.center = againButton.center
+        pygame.draw.rect(screen, white, againButton)
+        screen.blit(again, againRect)
+        click, _, _ = pygame.mouse.get_pressed()
+        if click == 1:
+            mouse = pygame.mouse.get_pos()
+            if againButton.collidepoint(mouse):
+                time.sleep(0.2)
+                if search is not None:
+                    cancel.set()
+                    search.cancel()
+                    search = None
+                user = None
+                board = new_board()
 
     pygame.display.flip()
+    clock.tick(60)
@@ -4,6 +4,7 @@ Tic Tac Toe Player
 
 import math
 import copy
+import time
 
 X = "X"
 O = "O"
@@ -138,62 +139,145 @@ def utility(board):
         return 0
 
 
-def max_value(board, alpha, beta, count):
+class SearchStats():
+    """
+    Statistics of one search, filled in by the engines while they search.
+    """
+
+    def __init__(self):
+        # number of explored states
+        self.nodes = 0
+        # states whose children were searched, and how many children
+        self.expanded = 0
+        self.children = 0
+        # alpha-beta cutoffs by depth (plies below the root)
+        self.cutoffs = dict()
+        # transposition table lookups that could be used
+        self.tt_hits = 0
+        # seconds spent searching
+        self.elapsed = 0.0
+        # best line of play found, starting with the chosen move
+        self.principal_variation = []
+
+    @property
+    def branching_factor(self):
+        """Average number of children searched per expanded state."""
+        if not self.expanded:
+            return 0.0
+        return self.children / self.expanded
+
+    @property
+    def nodes_per_second(self):
+        if not self.elapsed:
+            return 0.0
+        return self.nodes / self.elapsed
+
+    def cutoff(self, depth):
+        self.cutoffs[depth] = self.cutoffs.get(depth, 0) + 1
+
+    def merge(self, other, depth=0):
+        """
+        Adds the counts of `other`, a search started `depth` plies
+        below the root of this one.
+        """
+        self.nodes += other.nodes
+        self.expanded += other.expanded
+        self.children += other.children
+        self.tt_hits += other.tt_hits
+        for d, count in other.cutoffs.items():
+            self.cutoffs[d + depth] = self.cutoffs.get(d + depth, 0) + count
+
+    def __str__(self):
+        cutoffs = ", ".join(
+            f"{depth}: {count}" for depth, count in sorted(self.cutoffs.items())
+        )
+        return "\n".join([
+            f"Number of explored states: {self.nodes}",
+            f"Cutoffs by depth: {{{cutoffs}}}",
+            f"Transposition table hits: {self.tt_hits}",
+            f"Branching factor: {self.branching_factor:.2f}",
+            f"Elapsed: {self.elapsed:.4f}s ({self.nodes_per_second:.0f} states/s)",
+            f"Principal variation: {self.principal_variation}",
+        ])
+
+
+def max_value(board, alpha, beta, stats, depth=0):
     # initial value: worst possible val for max
     max_eval = -math.inf
-    best_move = None
+    best_line = []
+    stats.nodes += 1
     # first check if game is over
     if terminal(board):
-        return utility(board), None, count+1
+        return utility(board), []
+    stats.expanded += 1
     # find the highest value from the possible actions
     for action in actions(board):
-        val, move, count = min_value(result(board, action), alpha, beta, count)
+        stats.children += 1
+        val, line = min_value(result(board, action), alpha, beta, stats, depth + 1)
         if val > max_eval:
             max_eval = val
-            best_move = action
+            best_line = [action] + line
         alpha = max(alpha, val)
         if alpha >= beta:
+            stats.cutoff(depth)
             break
-    return max_eval, best_move, count+1
+    return max_eval, best_line
 
 
-def min_value(board, alpha, beta, count):
+def min_value(board, alpha, beta, stats, depth=0):
     # initial value: worst possible val for min
     min_eval = math.inf
-    best_move = None
+    best_line = []
+    stats.nodes += 1
     if terminal(board):
-        return utility(board), None, count+1
+        return utility(board), []
+    stats.expanded += 1
     # loop over all of the possible actions
     for action in actions(board):
+        stats.children += 1
         # find the lowest value from max players next move
-        val, move, count = max_value(result(board, action), alpha, beta, count)
+        val, line = max_value(result(board, action), alpha, beta, stats, depth + 1)
         if val < min_eval:
             min_eval = val
-            best_move = action
+            best_line = [action] + line
         beta = min(beta, val)
         if alpha >= beta:
+            stats.cutoff(depth)
             break
-    return min_eval, best_move, count+1
+    return min_eval, best_line
 
 
-def minimax(board):
+def search(board):
     """
-    Returns the optimal action for the current player on the board.
+    Returns the optimal action for the current player on the board,
+    together with the `SearchStats` of the search.
     """
-    # The move returned should be the optimal action (i, j) that is one of the allowable actions on the board.
-    # If multiple moves are equally optimal, any of those moves is acceptable.
-
+    stats = SearchStats()
     # If the board is a terminal board, the minimax function should return None.
     if terminal(board):
-        return None
+        return None, stats
     alpha = -math.inf
     beta = math.inf
 
+    start = time.perf_counter()
     if player(board) == X:
-        best_val, best_move, count = max_value(board, alpha, beta, 0)
-
+        best_val, best_line = max_value(board, alpha, beta, stats)
     else:
-        best_val, best_move, count = min_value(board, alpha, beta, 0)
+        best_val, best_line = min_value(board, alpha, beta, stats)
+    stats.elapsed = time.perf_counter() - start
+    stats.principal_variation = best_line
+
+    return best_line[0], stats
 
-    print(f"Number of explored states: {count}")
-    return best_move
+
+def minimax(board, verbose=False):
+    """
+    Returns the optimal action for the current player on the board.
+    With `verbose`, the statistics of the search are printed.
+    """
+    # The move returned should be the optimal action (i, j) that is one of the allowable actions on the board.
+    # If multiple moves are equally optimal, any of those moves is acceptable.
+    move, stats = search(board)
+    if verbose:
+        print(stats)
+    return move
@@ -0,0 +1,153 @@
+"""
+Benchmark of the entailment engines of model_check.
+
+    python3 benchmark.py [--families ring puzzle cnf] [--sizes 2 4 6 8]
+                         [--engines enumerate vector ...] [--workers 2 4]
+                         [--json results.json]
+
+Every knowledge base is asked whether it entails each of its symbols, one
+query at a time with `model_check`, all at once with `model_check_many`,
+and through a `KnowledgeBase`. With --workers, the compiled engine is
+also run on that many processes. The answers of all engines and modes must
+agree, otherwise the exit status is 1.
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+
+from generator import characters, puzzle, kcnf
+from knowledge import KnowledgeBase
+from logic import *
+
+ENGINES = ["enumerate", "prune", "compiled", "vector", "sat"]
+
+# the most symbols each engine is run on, the others have no limit
+LIMITS = {"enumerate": 16, "prune": 40, "compiled": 20, "vector": 26}
+
+# clauses per variable of the random 3-CNF formulas, below the threshold
+# where most of them become unsatisfiable
+CNF_RATIO = 3.0
+
+
+def ring(size):
+    """
+    Knights and knaves standing in a ring, where everybody says that the
+    next one is a knave. Returns the knowledge base and its symbols.
+    """
+    knights, knaves = characters(size)
+    sentences = []
+    for i in range(size):
+        statement = knaves[(i + 1) % size]
+        sentences.append(Or(knights[i], knaves[i]))
+        sentences.append(Not(And(knights[i], knaves[i])))
+        sentences.append(Implication(knights[i], statement))
+        sentences.append(Implication(knaves[i], Not(statement)))
+    return And(*sentences), knights + knaves
+
+
+def instance(family, size, rng):
+    """Returns the knowledge base and symbols of a benchmark instance."""
+    if family == "ring":
+        return ring(size)
+    if family == "puzzle":
+        return puzzle(size, rng=rng)
+    # clauses cannot have more distinct variables than there are
+    return kcnf(size, round(CNF_RATIO * size), k=min(3, size), rng=rng)
+
+
+def ask_knowledge_base(knowledge, symbols):
+    kb = KnowledgeBase(*knowledge.conjuncts)
+    return [kb.ask(symbol) for symbol in symbols]
+
+
+def timed(function, *args):
+    """Returns the result of calling `function` and the seconds it took."""
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument("--families", nargs="+",
+                        choices=["ring", "puzzle", "cnf"],
+                        default=["ring", "puzzle", "cnf"])
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[2, 4, 6, 8, 10])
+    parser.add_argument("--engines", nargs="+", choices=ENGINES,
+                        default=ENGINES)
+    parser.add_argument("--workers", type=int, nargs="*", default=[])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="file to write the results to")
+    args = parser.parse_args()
+
+    ok = True
+    results = []
+    for family in args.families:
+        for size in args.sizes:
+            rng = random.Random(f"{args.seed} {family} {size}")
+            knowledge, symbols = instance(family, size, rng)
+            print(f"{family} of {size}, {len(symbols)} symbols")
+            answers = dict()
+
+            def record(engine, mode, entailed, seconds):
+                answers[engine, mode] = entailed
+                results.append({
+                    "family": family, "size": size,
+                    "symbols": len(symbols), "engine": engine,
+                    "mode": mode, "seconds": seconds,
+                    "entailed": sum(entailed),
+                })
+
+            for engine in args.engines:
+                if len(symbols) > LIMITS.get(engine, len(symbols)):
+                    print(f"    {engine:10} skipped")
+                    continue
+                single, one_by_one = timed(
+                    lambda: [model_check(knowledge, symbol, engine)
+                             for symbol in symbols]
+                )
+                record(engine, "one by one", single, one_by_one)
+                many, batched = timed(model_check_many, knowledge, symbols,
+                                      engine)
+                record(engine, "batched", many, batched)
+                print(f"    {engine:10} {one_by_one:9.4f}s one by one, "
+                      f"{batched:9.4f}s batched")
+
+            for workers in args.workers:
+                if len(symbols) > LIMITS["compiled"]:
+                    break
+                entailed, seconds = timed(
+                    lambda: [model_check(knowledge, symbol, "compiled",
+                                         workers)
+                             for symbol in symbols]
+                )
+                record("compiled", f"workers={workers}", entailed, seconds)
+                print(f"    {'compiled':10} {seconds:9.4f}s one by one, "
+                      f"workers={workers}")
+
+            entailed, seconds = timed(ask_knowledge_base, knowledge, symbols)
+            record("knowledge", "incremental", entailed, seconds)
+            print(f"    {'knowledge':10} {seconds:9.4f}s incremental")
+
+            if len(set(map(tuple, answers.values()))) > 1:
+                ok = False
+                print("    engines disagree")
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump({
+                "python": platform.python_version(),
+                "seed": args.seed,
+                "agree": ok,
+                "results": results,
+            }, file, indent=2)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
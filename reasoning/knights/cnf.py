@@ -0,0 +1,270 @@
+"""
+Conversion of logical sentences to conjunctive normal form (CNF).
+
+Literals are integers, as used by SAT solvers and the DIMACS format:
+variable `v` is the literal `v`, its negation `-v`. Sentences go through
+a pipeline before they are encoded: implications are eliminated,
+negations are pushed down to the symbols, and the result is simplified.
+"""
+
+from array import array
+
+from logic import (Sentence, Symbol, Not, And, Or, Implication,
+                   Biconditional, postorder)
+
+# the constants, as the empty conjunction and the empty disjunction
+TRUE = And()
+FALSE = Or()
+
+
+def eliminate_implications(sentence):
+    """
+    Returns an equivalent sentence built only from symbols, Not, And
+    and Or.
+    """
+    def eliminate(sentence, operands):
+        if isinstance(sentence, Symbol):
+            return sentence
+        if isinstance(sentence, Not):
+            return Not(operands[0])
+        if isinstance(sentence, And):
+            return And(*operands)
+        if isinstance(sentence, Or):
+            return Or(*operands)
+        if isinstance(sentence, Implication):
+            return Or(Not(operands[0]), operands[1])
+        if isinstance(sentence, Biconditional):
+            left, right = operands
+            return And(Or(Not(left), right), Or(left, Not(right)))
+        raise TypeError("must be a logical sentence")
+
+    return postorder(sentence, eliminate)
+
+
+def negation_normal_form(sentence):
+    """
+    Returns an equivalent sentence where Not is only applied to symbols.
+    `sentence` must be built from symbols, Not, And and Or.
+    """
+    # nodes are a sentence and whether it is negated
+    def children(node):
+        sentence, negated = node
+        if isinstance(sentence, Symbol):
+            return ()
+        if isinstance(sentence, Not):
+            return ((sentence.operand, not negated),)
+        if isinstance(sentence, (And, Or)):
+            return tuple((operand, negated)
+                         for operand in sentence.children())
+        raise TypeError("implications must be eliminated first")
+
+    def push(node, operands):
+        sentence, negated = node
+        if isinstance(sentence, Symbol):
+            return Not(sentence) if negated else sentence
+        if isinstance(sentence, Not):
+            return operands[0]
+        if isinstance(sentence, And) != negated:
+            return And(*operands)
+        return Or(*operands)
+
+    return postorder((sentence, False), push, children)
+
+
+def simplify(sentence):
+    """
+    Simplifies a sentence in negation normal form: nested conjunctions and
+    disjunctions are flattened, duplicate operands removed, and constants
+    folded, including a literal together with its negation.
+    Returns TRUE or FALSE if the sentence is constant.
+    """
+    def fold(operands, kind, unit, zero):
+        # `unit` is dropped from the operands, `zero` absorbs all of them
+        flat = []
+        seen = set()
+        for operand in operands:
+            if operand is zero:
+                return zero
+            # operands of the same kind are flattened into this one
+            if isinstance(operand, kind):
+                parts = operand.conjuncts if kind is And \
+                    else operand.disjuncts
+            else:
+                parts = (operand,)
+            for part in parts:
+                if part in seen:
+                    continue
+                if isinstance(part, Not):
+                    complement = part.operand
+                else:
+                    complement = Not(part)
+                if complement in seen:
+                    return zero
+                seen.add(part)
+                flat.append(part)
+        if len(flat) == 1:
+            return flat[0]
+        return kind(*flat) if flat else unit
+
+    def children(sentence):
+        if isinstance(sentence, (Symbol, Not)):
+            return ()
+        if isinstance(sentence, (And, Or)):
+            return sentence.children()
+        raise TypeError("must be in negation normal form")
+
+    def visit(sentence, operands):
+        if isinstance(sentence, (Symbol, Not)):
+            return sentence
+        if isinstance(sentence, And):
+            return fold(operands, And, TRUE, FALSE)
+        return fold(operands, Or, FALSE, TRUE)
+
+    return postorder(sentence, visit, children)
+
+
+def normalize(sentence):
+    """
+    Returns `sentence` in simplified negation normal form.
+    """
+    return simplify(negation_normal_form(eliminate_implications(sentence)))
+
+
+def to_cnf(sentence):
+    """
+    Returns an `Encoder` holding the clauses of `sentence`.
+    """
+    encoder = Encoder()
+    encoder.add(sentence)
+    return encoder
+
+
+class Clauses():
+    """
+    Clauses stored in one flat array of integers, every clause followed by
+    a 0 as in the DIMACS format.
+    """
+
+    def __init__(self):
+        self.literals = array("i")
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        return self.iterate()
+
+    def append(self, clause):
+        self.literals.extend(clause)
+        self.literals.append(0)
+        self.count += 1
+
+    def iterate(self, start=0):
+        """
+        Yields the clauses as lists of literals, from position `start` of
+        `literals`.
+        """
+        clause = []
+        for literal in self.literals[start:]:
+            if literal:
+                clause.append(literal)
+            else:
+                yield clause
+                clause = []
+
+
+class Encoder():
+    """
+    Tseitin encoding of sentences into clauses.
+
+    Sentences are normalized first. Then every symbol gets a variable, and
+    every compound sub-sentence gets an auxiliary variable with clauses
+    defining it as equivalent to the sub-sentence. The number of clauses
+    grows linearly with the size of the sentences, and identical
+    sub-sentences are only encoded once. Sentences can be added one after
+    another.
+    """
+
+    def __init__(self):
+        self.variables = dict()
+        # name of every variable, None for auxiliary variables
+        self.names = [None]
+        self.definitions = dict()
+        self.clauses = Clauses()
+
+    def variable(self, name=None):
+        """Returns a new variable."""
+        self.names.append(name)
+        return len(self.names) - 1
+
+    def symbol(self, name):
+        """Returns the variable of the symbol called `name`."""
+        if name not in self.variables:
+            self.variables[name] = self.variable(name)
+        return self.variables[name]
+
+    def add(self, sentence):
+        """
+        Adds clauses requiring `sentence` to be true.
+        """
+        self.require(normalize(sentence))
+
+    def require(self, sentence):
+        # a conjunction at the top is just several sentences
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.require(conjunct)
+        # a disjunction at the top is a single clause
+        elif isinstance(sentence, Or):
+            self.clauses.append(
+                [self.encode(disjunct) for disjunct in sentence.disjuncts]
+            )
+        else:
+            self.clauses.append([self.encode(sentence)])
+
+    def literal(self, sentence):
+        """
+        Returns a literal that is true exactly when `sentence` is.
+        """
+        return self.encode(normalize(sentence))
+
+    def encode(self, sentence):
+        """Returns the literal of a normalized sentence."""
+        # sub-sentences that are already defined need not be walked
+        def children(sentence):
+            if sentence in self.definitions:
+                return ()
+            return Sentence.operands(sentence)
+
+        return postorder(sentence, self.define, children)
+
+    def define(self, sentence, literals):
+        """
+        Returns the literal of a sentence, given those of its operands,
+        with clauses defining an auxiliary variable if it is compound.
+        """
+        if isinstance(sentence, Symbol):
+            return self.symbol(sentence.name)
+        if isinstance(sentence, Not):
+            return -literals[0]
+        if sentence in self.definitions:
+            return self.definitions[sentence]
+
+        if isinstance(sentence, And):
+            t = self.variable()
+            # t => each conjunct, all conjuncts => t
+            for literal in literals:
+                self.clauses.append([-t, literal])
+            self.clauses.append([t] + [-literal for literal in literals])
+        elif isinstance(sentence, Or):
+            t = self.variable()
+            # each disjunct => t, t => some disjunct
+            for literal in literals:
+                self.clauses.append([t, -literal])
+            self.clauses.append([-t] + literals)
+        else:
+            raise TypeError("must be a logical sentence")
+
+        self.definitions[sentence] = t
+        return t
@@ -0,0 +1,147 @@
+"""
+Compilation of logical sentences into Python functions.
+
+Instead of walking the sentence objects for every model, a sentence is
+turned once into the source of a single Python function over a sequence
+of truth values, indexed by symbol.
+"""
+
+import collections
+import itertools
+
+from logic import (Sentence, Symbol, Not, And, Or, Implication,
+                   Biconditional, postorder)
+
+# sub-expressions nested deeper than this are stored in local variables,
+# which keeps the generated source within the limits of Python's parser
+MAX_NESTING = 50
+
+# sub-expressions used by more than this many sentences are stored in local
+# variables, which keeps the source linear in the distinct sub-sentences
+MAX_USES = 1
+
+
+class Compiled():
+    """
+    A sentence compiled into a function of a sequence of truth values,
+    where `values[i]` is the value of the symbol `symbols[i]`.
+    """
+
+    def __init__(self, sentence, symbols=None):
+        if symbols is None:
+            symbols = sorted(sentence.symbols())
+        self.sentence = sentence
+        self.symbols = list(symbols)
+        self.index = {name: i for i, name in enumerate(self.symbols)}
+        self.lines = []
+
+        expression, _ = self.emit(sentence)
+        body = "".join(f"    {line}\n" for line in self.lines)
+        self.source = f"def compiled(v):\n{body}    return {expression}\n"
+        namespace = dict()
+        exec(self.source, namespace)
+        self.function = namespace["compiled"]
+
+    def __call__(self, values):
+        return self.function(values)
+
+    def evaluate(self, model):
+        """
+        Evaluates the sentence in a model, like `Sentence.evaluate`. A
+        model that lacks some of the symbols is evaluated by the sentence
+        itself, which only fails if a missing symbol is actually needed.
+        """
+        values = []
+        for name in self.symbols:
+            if name not in model:
+                return self.sentence.evaluate(model)
+            values.append(bool(model[name]))
+        return self.function(values)
+
+    def emit(self, sentence):
+        """
+        Returns a Python expression for `sentence` and how deeply it nests.
+        Sub-sentences are emitted bottom up with an explicit stack, so deep
+        sentences do not overflow Python's stack either.
+        """
+        def children(sentence):
+            if isinstance(sentence, Symbol):
+                return ()
+            return Sentence.operands(sentence)
+
+        def count(sentence, operands):
+            self.uses.update(children(sentence))
+
+        # interned sentences share sub-sentences, which are emitted once
+        self.uses = collections.Counter()
+        postorder(sentence, count, children)
+        return postorder(sentence, self.expression, children)
+
+    def expression(self, sentence, operands):
+        """
+        Returns a Python expression for `sentence` and how deeply it nests,
+        given those of its operands.
+        """
+        if isinstance(sentence, Symbol):
+            return f"v[{self.index[sentence.name]}]", 0
+
+        if isinstance(sentence, Not):
+            operand, depth = operands[0]
+            expression = f"(not {operand})"
+        elif isinstance(sentence, And):
+            expression, depth = self.join(operands, "and", "True")
+        elif isinstance(sentence, Or):
+            expression, depth = self.join(operands, "or", "False")
+        elif isinstance(sentence, Implication):
+            (antecedent, a), (consequent, b) = operands
+            expression = f"(not {antecedent} or {consequent})"
+            depth = max(a, b)
+        elif isinstance(sentence, Biconditional):
+            (left, a), (right, b) = operands
+            # operands are booleans, so equality is the biconditional
+            expression = f"({left} == {right})"
+            depth = max(a, b)
+        else:
+            raise TypeError("must be a logical sentence")
+
+        depth += 1
+        if depth >= MAX_NESTING or self.uses[sentence] > MAX_USES:
+            name = f"t{len(self.lines)}"
+            self.lines.append(f"{name} = {expression}")
+            return name, 0
+        return expression, depth
+
+    def join(self, parts, operator, empty):
+        if not parts:
+            return empty, 0
+        expression = f" {operator} ".join(part for part, _ in parts)
+        return f"({expression})", max(depth for _, depth in parts)
+
+
+def entails(knowledge, query):
+    """
+    Checks if knowledge base entails query, by evaluating the compiled
+    knowledge => query in every model.
+    """
+    check = Compiled(Implication(knowledge, query))
+    models = itertools.product((True, False), repeat=len(check.symbols))
+    return all(map(check.function, models))
+
+
+def entails_many(knowledge, queries):
+    """
+    Checks which of the queries knowledge base entails, enumerating the
+    models of knowledge only once.
+    """
+    symbols = sorted(knowledge.symbols().union(
+        *[query.symbols() for query in queries]
+    ))
+    known = Compiled(knowledge, symbols)
+    checks = [Compiled(query, symbols).function for query in queries]
+    entailed = [True] * len(queries)
+    models = itertools.product((True, False), repeat=len(symbols))
+    for model in filter(known.function, models):
+        for i, check in enumerate(checks):
+            if entailed[i] and not check(model):
+                entailed[i] = False
+    return entailed
@@ -0,0 +1,345 @@
+"""
+Counting and listing the models of a knowledge base.
+
+The knowledge base is converted to clauses first. Its Tseitin variables
+are defined as equivalent to sub-sentences, so every model of the
+knowledge base extends to exactly one model of the clauses, and counting
+the models of the clauses counts the models of the knowledge base.
+
+Models are given as bitmasks over the sorted symbols: bit i is set when
+symbol i is true.
+"""
+
+from collections import Counter
+
+from cnf import Encoder
+
+# rounds of unit propagation over all clauses before they are indexed
+PROPAGATION_ROUNDS = 4
+
+# the branch variable is chosen by its position in the clauses when at
+# least one in this many variables is among the most frequent
+TIES_RATIO = 4
+
+
+def clauses_of(knowledge, symbols):
+    """
+    Returns the clauses of `knowledge` as frozensets of literals, and the
+    variable of every name in `symbols`.
+    """
+    encoder = Encoder()
+    variables = [encoder.symbol(name) for name in symbols]
+    encoder.add(knowledge)
+    clauses = []
+    for clause in encoder.clauses:
+        clause = frozenset(clause)
+        # tautologies constrain nothing
+        if not any(-literal in clause for literal in clause):
+            clauses.append(clause)
+    return clauses, variables
+
+
+def condition(clauses, literal):
+    """
+    Returns the clauses with `literal` true, or None if one of them
+    becomes empty.
+    """
+    result = []
+    for clause in clauses:
+        if literal in clause:
+            continue
+        if -literal in clause:
+            clause = clause - {-literal}
+            if not clause:
+                return None
+        result.append(clause)
+    return result
+
+
+def propagate(clauses):
+    """
+    Assigns the literals of unit clauses until there are none. Returns
+    the remaining clauses and the assigned literals, or None, None on a
+    conflict.
+
+    The literals of all unit clauses are assigned together, for a few
+    rounds. If there are still unit clauses after that, the literals they
+    imply are followed through an index of the clauses, so that a long
+    chain of implied literals takes linear rather than quadratic time.
+    """
+    assigned = []
+    for _ in range(PROPAGATION_ROUNDS):
+        units = {next(iter(clause)) for clause in clauses if len(clause) == 1}
+        if not units:
+            return clauses, assigned
+        false = {-literal for literal in units}
+        if not units.isdisjoint(false):
+            return None, None
+        assigned.extend(units)
+        result = []
+        for clause in clauses:
+            if not clause.isdisjoint(units):
+                continue
+            if not clause.isdisjoint(false):
+                clause = clause - false
+                if not clause:
+                    return None, None
+            result.append(clause)
+        clauses = result
+    return follow(clauses, assigned)
+
+
+def follow(clauses, assigned):
+    """
+    Finishes `propagate` with the clauses indexed by their literals, so
+    that every clause is only looked at again when one of its literals
+    becomes false.
+    """
+    occurs = dict()
+    for index, clause in enumerate(clauses):
+        for literal in clause:
+            occurs.setdefault(literal, []).append(index)
+    # unassigned literals left in every clause, until it is satisfied
+    size = [len(clause) for clause in clauses]
+    satisfied = [False] * len(clauses)
+    true = set()
+    queue = [next(iter(clause)) for clause in clauses if len(clause) == 1]
+    while queue:
+        literal = queue.pop()
+        if literal in true:
+            continue
+        if -literal in true:
+            return None, None
+        true.add(literal)
+        assigned.append(literal)
+        for index in occurs.get(literal, ()):
+            satisfied[index] = True
+        for index in occurs.get(-literal, ()):
+            if satisfied[index]:
+                continue
+            size[index] -= 1
+            if size[index] == 0:
+                return None, None
+            if size[index] == 1:
+                queue.extend(other for other in clauses[index]
+                             if -other not in true)
+    false = {-literal for literal in true}
+    return [clause - false for index, clause in enumerate(clauses)
+            if not satisfied[index]], assigned
+
+
+def components(clauses):
+    """
+    Splits the clauses into groups that share no variables.
+    """
+    # union-find over variables
+    parent = dict()
+
+    def find(var):
+        while parent[var] != var:
+            parent[var] = parent[parent[var]]
+            var = parent[var]
+        return var
+
+    for clause in clauses:
+        variables = [abs(literal) for literal in clause]
+        for var in variables:
+            parent.setdefault(var, var)
+        root = find(variables[0])
+        for var in variables[1:]:
+            parent[find(var)] = root
+
+    groups = dict()
+    for clause in clauses:
+        groups.setdefault(find(abs(next(iter(clause)))), []).append(clause)
+    return list(groups.values())
+
+
+def variables_of(clauses):
+    return {abs(literal) for clause in clauses for literal in clause}
+
+
+def separator(clauses):
+    """
+    Returns a variable to branch on in a connected group of clauses: one
+    of the most frequent variables, and if many are, the one that best
+    splits the clauses into independent groups once it is assigned.
+
+    The variables are layered by their distance from a variable at one
+    end of the group. A variable in a narrow layer separates the clauses
+    on either side of the layer, and one in the middle splits them into
+    parts of similar size, so that a chain of clauses is halved rather
+    than shortened by one variable.
+    """
+    frequency = Counter(abs(literal)
+                        for clause in clauses for literal in clause)
+    most = max(frequency.values())
+    candidates = [var for var in frequency if frequency[var] == most]
+    # unless many variables are as frequent, frequency alone decides
+    if len(candidates) * TIES_RATIO < len(frequency):
+        return candidates[0]
+    occurs = dict()
+    for index, clause in enumerate(clauses):
+        for literal in clause:
+            occurs.setdefault(abs(literal), []).append(index)
+
+    def layers(start):
+        """Returns the variables by their distance from `start`."""
+        reached = {start}
+        used = set()
+        layer = [start]
+        result = []
+        while layer:
+            result.append(layer)
+            following = []
+            for var in layer:
+                for index in occurs[var]:
+                    if index in used:
+                        continue
+                    used.add(index)
+                    for literal in clauses[index]:
+                        if abs(literal) not in reached:
+                            reached.add(abs(literal))
+                            following.append(abs(literal))
+            layer = following
+        return result
+
+    # the farthest variable from any variable is near one end
+    structure = layers(layers(candidates[0])[-1][0])
+    level = dict()
+    for distance, layer in enumerate(structure):
+        for var in layer:
+            level[var] = distance
+    count = len(structure)
+    return min(candidates, key=lambda var: (
+        len(structure[level[var]]), abs(2 * level[var] - count + 1)
+    ))
+
+
+def count_models(knowledge, symbols=None):
+    """
+    Returns the number of models of `knowledge` over `symbols`, by
+    default its own symbols. `symbols` must include all symbols of the
+    knowledge base, and every other symbol in it doubles the count.
+
+    Clauses are split into independent components whose counts multiply,
+    and the count of every component is cached, so that components that
+    come up again in other branches are only counted once. Components are
+    branched on a variable that separates them, see `separator`, and the
+    search runs on an explicit stack, so long chains of clauses neither
+    take one level per variable nor overflow Python's stack.
+    """
+    if symbols is None:
+        symbols = sorted(knowledge.symbols())
+    clauses, variables = clauses_of(knowledge, symbols)
+    if frozenset() in clauses:
+        return 0
+    cache = dict()
+
+    def counting(clauses, variables):
+        """
+        Returns the frame counting the models of `clauses` over the set
+        `variables`: [components, next component, product so far].
+        """
+        clauses, assigned = propagate(clauses)
+        if clauses is None:
+            return [[], 0, 0]
+        variables = variables - {abs(literal) for literal in assigned}
+        used = variables_of(clauses)
+        return [components(clauses), 0, 2 ** len(variables - used)]
+
+    def branching(clauses):
+        """
+        Returns the frame counting the models of a connected group of
+        clauses: [clauses, variable, other variables, next value, sum].
+        """
+        var = separator(clauses)
+        variables = variables_of(clauses)
+        variables.discard(var)
+        return [clauses, var, variables, 0, 0]
+
+    # auxiliary variables are determined by the symbols, so they are
+    # counted along with the clauses but never free
+    stack = [counting(clauses, set(variables) | variables_of(clauses))]
+    # the count of the frame that was finished last
+    value = None
+    while stack:
+        frame = stack[-1]
+        if len(frame) == 3:
+            parts, index, total = frame
+            if value is not None:
+                # the branching frame of the previous component returned
+                cache[frozenset(parts[index - 1])] = value
+                total *= value
+                value = None
+            while total and index < len(parts):
+                key = frozenset(parts[index])
+                index += 1
+                if key not in cache:
+                    break
+                total *= cache[key]
+            else:
+                stack.pop()
+                value = total
+                continue
+            frame[1:] = index, total
+            stack.append(branching(parts[index - 1]))
+        else:
+            clauses, var, variables, step, total = frame
+            if value is not None:
+                total += value
+                value = None
+            if step == 2:
+                stack.pop()
+                value = total
+                continue
+            frame[3:] = step + 1, total
+            conditioned = condition(clauses, var if step == 0 else -var)
+            if conditioned is not None:
+                stack.append(counting(conditioned, variables))
+    return value
+
+
+def iter_models(knowledge, symbols=None):
+    """
+    Yields the models of `knowledge` over `symbols`, by default its own
+    symbols, as bitmasks where bit i is the value of `symbols[i]`.
+    `symbols` must include all symbols of the knowledge base.
+    Models are generated lazily, and branches that unit propagation shows
+    to have no models are skipped.
+    """
+    if symbols is None:
+        symbols = sorted(knowledge.symbols())
+    clauses, variables = clauses_of(knowledge, symbols)
+    if frozenset() in clauses:
+        return
+    bits = {var: 1 << i for i, var in enumerate(variables)}
+
+    # branches still to search, as (clauses, index of the next symbol,
+    # mask so far, assigned variables), searched with an explicit stack
+    stack = [(clauses, 0, 0, dict())]
+    while stack:
+        clauses, index, mask, assigned = stack.pop()
+        clauses, implied = propagate(clauses)
+        if clauses is None:
+            continue
+        assigned = assigned | {abs(literal): literal > 0
+                               for literal in implied}
+        # symbols assigned by propagation are not branched on
+        while index < len(variables) and variables[index] in assigned:
+            if assigned[variables[index]]:
+                mask |= bits[variables[index]]
+            index += 1
+        if index == len(variables):
+            # the symbols determine the remaining auxiliary variables
+            if not clauses:
+                yield mask
+            continue
+        var = variables[index]
+        # the branch where it is true is searched first
+        for literal in (-var, var):
+            conditioned = condition(clauses, literal)
+            if conditioned is not None:
+                stack.append((conditioned, index + 1,
+                              mask | bits[var] if literal > 0 else mask,
+                              assigned))
@@ -0,0 +1,72 @@
+"""
+Random knowledge bases: knights-and-knaves puzzles and k-CNF formulas.
+"""
+
+import random
+
+from logic import Symbol, Not, And, Or, Implication, Biconditional
+
+
+def characters(count):
+    """Returns the knight and the knave symbols of `count` characters."""
+    knights = [Symbol(f"{i} is a Knight") for i in range(count)]
+    knaves = [Symbol(f"{i} is a Knave") for i in range(count)]
+    return knights, knaves
+
+
+def claim(rng, knights, knaves):
+    """Returns a random statement about one or two characters."""
+    a = rng.randrange(len(knights))
+    b = rng.randrange(len(knights))
+    kind = rng.randrange(5)
+    if kind == 0:
+        # "a is a knight."
+        return knights[a]
+    if kind == 1:
+        # "a is a knave."
+        return knaves[a]
+    if kind == 2:
+        # "a and b are of the same kind."
+        return Biconditional(knights[a], knights[b])
+    if kind == 3:
+        # "At least one of a and b is a knave."
+        return Or(knaves[a], knaves[b])
+    # "a and b are both knights."
+    return And(knights[a], knights[b])
+
+
+def puzzle(count, statements=1, rng=None):
+    """
+    Returns a random knights-and-knaves puzzle with `count` characters,
+    each making `statements` random statements about the others or
+    themselves, as a knowledge base and the list of its symbols.
+    Knights always tell the truth and knaves always lie, like in
+    `puzzle.py`. The puzzle may have no solution or several.
+    """
+    rng = rng or random.Random()
+    knights, knaves = characters(count)
+    sentences = []
+    for i in range(count):
+        # a knight or a knave but not both
+        sentences.append(Or(knights[i], knaves[i]))
+        sentences.append(Not(And(knights[i], knaves[i])))
+        for _ in range(statements):
+            statement = claim(rng, knights, knaves)
+            sentences.append(Implication(knights[i], statement))
+            sentences.append(Implication(knaves[i], Not(statement)))
+    return And(*sentences), knights + knaves
+
+
+def kcnf(variables, clauses, k=3, rng=None):
+    """
+    Returns a random k-CNF formula with `clauses` clauses of `k` distinct
+    variables out of `variables`, each negated with probability 1/2, and
+    the list of its symbols.
+    """
+    rng = rng or random.Random()
+    symbols = [Symbol(f"x{i}") for i in range(variables)]
+    return And(*[
+        Or(*[symbol if rng.random() < 0.5 else Not(symbol)
+             for symbol in rng.sample(symbols, k)])
+        for _ in range(clauses)
+    ]), symbols
@@ -0,0 +1,85 @@
+"""
+Knowledge base that grows one sentence at a time and answers queries
+with a SAT solver kept between calls.
+"""
+
+from cnf import Encoder
+from logic import And
+from sat import Solver
+
+
+class KnowledgeBase():
+    """
+    Sentences told to the knowledge base are encoded into clauses once and
+    added to a single solver. A query is answered by asking that solver
+    for a model with the assumptions true and the query false, so what
+    the solver learns from one question carries over to the next, and
+    telling a new sentence only adds its clauses.
+
+    Assumptions hold only for one call, which makes it possible to ask
+    "what if" questions without changing the knowledge base: telling
+    `Implication(selector, sentence)` and assuming `selector` switches a
+    group of sentences on for a query.
+    """
+
+    def __init__(self, *sentences):
+        self.encoder = Encoder()
+        self.solver = Solver()
+        self.sentences = []
+        # position in the encoder's clauses up to which the solver has them
+        self.added = 0
+        for sentence in sentences:
+            self.tell(sentence)
+
+    def __len__(self):
+        return len(self.sentences)
+
+    def sentence(self):
+        """Returns the conjunction of everything told so far."""
+        return And(*self.sentences)
+
+    def tell(self, sentence):
+        """Adds `sentence` to the knowledge base."""
+        self.encoder.add(sentence)
+        self.sentences.append(sentence)
+        self.flush()
+
+    def flush(self):
+        """Passes the clauses encoded since the last call to the solver."""
+        clauses = self.encoder.clauses
+        self.solver.reserve(len(self.encoder.names) - 1)
+        for clause in clauses.iterate(self.added):
+            self.solver.add_clause(clause)
+        self.added = len(clauses.literals)
+
+    def literals(self, sentences):
+        literals = [self.encoder.literal(sentence) for sentence in sentences]
+        self.flush()
+        return literals
+
+    def ask(self, query, assumptions=()):
+        """
+        Checks if the knowledge base, together with the sentences in
+        `assumptions`, entails `query`.
+        """
+        literals = self.literals(list(assumptions) + [query])
+        literals[-1] = -literals[-1]
+        return not self.solver.solve(literals)
+
+    def consistent(self, assumptions=()):
+        """
+        Checks if the knowledge base, together with the sentences in
+        `assumptions`, has a model.
+        """
+        return self.solver.solve(self.literals(assumptions))
+
+    def model(self, assumptions=()):
+        """
+        Returns a model of the knowledge base and the assumptions, as a
+        dict from symbol name to value, or None if there is none.
+        """
+        if not self.consistent(assumptions):
+            return None
+        values = self.solver.model
+        return {name: values[var] == 1
+                for name, var in self.encoder.variables.items()}
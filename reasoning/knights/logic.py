@@ -1,19 +1,331 @@
 import itertools
+import weakref
+
+# sentences nested deeper than this are evaluated with an explicit stack
+# rather than by recursion, which is faster but limited by Python's stack
+MAX_RECURSION = 100
 
 
 class Sentence():
+    """
+    Sentences are immutable and interned: constructing a sentence that is
+    structurally identical to an existing one returns the existing object.
+    Equal sentences are therefore the same object, and their hash, symbols
+    and formula are computed once and cached on it.
+    """
+
+    __slots__ = ("_hash", "_depth", "_symbols", "_formula", "__weakref__")
+
+    # every live sentence, by its class and arguments
+    interned = weakref.WeakValueDictionary()
+
+    @classmethod
+    def intern(cls, args, key):
+        """
+        Returns the sentence of this class with arguments `args`, and
+        whether it was newly created. `key` is hashed for the new sentence.
+        """
+        sentence = Sentence.interned.get((cls,) + args)
+        if sentence is not None:
+            return sentence, False
+        sentence = object.__new__(cls)
+        object.__setattr__(sentence, "_hash", hash(key))
+        object.__setattr__(sentence, "_depth", 1 + max(
+            (arg._depth for arg in args if isinstance(arg, Sentence)),
+            default=0
+        ))
+        object.__setattr__(sentence, "_symbols", None)
+        object.__setattr__(sentence, "_formula", None)
+        Sentence.interned[(cls,) + args] = sentence
+        return sentence, True
+
+    def __new__(cls):
+        return cls.intern((), ("sentence",))[0]
+
+    def __setattr__(self, name, value):
+        raise AttributeError("sentences are immutable")
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        # unpickling constructs the sentence again, so it is interned;
+        # deep sentences are pickled as a flat list of their nodes, since
+        # pickling nested objects recurses
+        if self._depth > MAX_RECURSION:
+            return (rebuild, (flatten(self),))
+        return (self.__class__, self.__getnewargs__())
+
+    def __getnewargs__(self):
+        return ()
+
+    def cache(self, name, value):
+        object.__setattr__(self, name, value)
+        return value
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
-        raise Exception("nothing to evaluate")
+        # evaluated with an explicit stack instead of recursion, so that
+        # deep sentences do not overflow Python's stack; frames are
+        # [sentence, next operand, value of the left operand]
+        stack = [[self, 0, None]]
+        value = None
+        while stack:
+            frame = stack[-1]
+            sentence, step = frame[0], frame[1]
+            if isinstance(sentence, Symbol):
+                value = sentence.evaluate(model)
+            elif isinstance(sentence, Not):
+                if step == 0:
+                    frame[1] = 1
+                    stack.append([sentence.operand, 0, None])
+                    continue
+                value = not value
+            elif isinstance(sentence, (And, Or)):
+                operands = sentence.conjuncts if isinstance(sentence, And) \
+                    else sentence.disjuncts
+                # stop at the first false conjunct or true disjunct
+                deciding = isinstance(sentence, Or)
+                if step > 0 and value is deciding:
+                    value = deciding
+                elif step == len(operands):
+                    value = not deciding
+                else:
+                    frame[1] = step + 1
+                    stack.append([operands[step], 0, None])
+                    continue
+            elif isinstance(sentence, Implication):
+                if step == 0:
+                    frame[1] = 1
+                    stack.append([sentence.antecedent, 0, None])
+                    continue
+                if step == 1 and value:
+                    frame[1] = 2
+                    stack.append([sentence.consequent, 0, None])
+                    continue
+                value = True if step == 1 else value
+            elif isinstance(sentence, Biconditional):
+                if step < 2:
+                    if step == 1:
+                        frame[2] = value
+                    frame[1] = step + 1
+                    child = sentence.left if step == 0 else sentence.right
+                    stack.append([child, 0, None])
+                    continue
+                value = frame[2] == value
+            else:
+                raise Exception("nothing to evaluate")
+            stack.pop()
+        return value
+
+    def evaluate_columns(self, columns, mask):
+        """Evaluates the logical sentence in many models at once.
+
+        `columns` maps each symbol to an integer whose bit i is the value
+        of the symbol in model i, and `mask` has a bit set for every model.
+        Returns the integer of the sentence's values in those models.
+        """
+        # frames are [sentence, next operand, values folded so far], as
+        # in `evaluate`
+        stack = [[self, 0, None]]
+        value = None
+        while stack:
+            frame = stack[-1]
+            sentence, step = frame[0], frame[1]
+            if isinstance(sentence, Symbol):
+                value = sentence.evaluate_columns(columns, mask)
+                stack.pop()
+                continue
+            if not isinstance(sentence, (Not, And, Or, Implication,
+                                         Biconditional)):
+                raise Exception("nothing to evaluate")
+            if step == 0:
+                frame[2] = mask if isinstance(sentence, And) else 0
+            elif isinstance(sentence, And):
+                frame[2] &= value
+            elif isinstance(sentence, Or) or step == 2 and \
+                    isinstance(sentence, Implication):
+                frame[2] |= value
+            elif isinstance(sentence, (Not, Implication)):
+                frame[2] = mask ^ value
+            elif step == 1:
+                frame[2] = value
+            else:
+                frame[2] = mask ^ (frame[2] ^ value)
+            children = sentence.children()
+            if step < len(children):
+                frame[1] = step + 1
+                stack.append([children[step], 0, None])
+                continue
+            value = frame[2]
+            stack.pop()
+        return value
+
+    def evaluate_partial(self, model):
+        """Evaluates the logical sentence in a partial model.
+
+        Symbols missing from `model` are unknown. Returns True or False
+        if the sentence has that value however they are assigned, and
+        None if it depends on them.
+        """
+        # frames are [sentence, next operand, value so far], as in
+        # `evaluate`; a frame is done once `value` is its result
+        stack = [[self, 0, None]]
+        value = None
+        while stack:
+            frame = stack[-1]
+            sentence, step = frame[0], frame[1]
+            done = True
+            if isinstance(sentence, Symbol):
+                value = sentence.evaluate_partial(model)
+            elif isinstance(sentence, Not):
+                done = step == 1
+                if done and value is not None:
+                    value = not value
+            elif isinstance(sentence, (And, Or)):
+                # a false conjunct or a true disjunct decides
+                deciding = isinstance(sentence, Or)
+                if step == 0:
+                    frame[2] = not deciding
+                elif value is deciding:
+                    frame[2] = deciding
+                    step = len(sentence.children())
+                elif value is None:
+                    frame[2] = None
+                done = step == len(sentence.children())
+                if done:
+                    value = frame[2]
+            elif isinstance(sentence, Implication):
+                if step == 1:
+                    frame[2] = value
+                    done = value is False
+                    value = True if done else value
+                elif step == 2:
+                    if value is not True:
+                        value = None if frame[2] is None or value is None \
+                            else False
+                else:
+                    done = False
+            elif isinstance(sentence, Biconditional):
+                if step == 1:
+                    frame[2] = value
+                    done = value is None
+                elif step == 2:
+                    if value is not None:
+                        value = frame[2] == value
+                else:
+                    done = False
+            else:
+                raise Exception("nothing to evaluate")
+            if done:
+                stack.pop()
+            else:
+                frame[1] = step + 1
+                stack.append([sentence.children()[step], 0, None])
+        return value
+
+    def __repr__(self):
+        return "".join(self.pieces("repr"))
 
     def formula(self):
         """Returns string formula representing logical sentence."""
-        return ""
+        if self._formula is None:
+            return self.cache("_formula", "".join(self.pieces()))
+        return self._formula
+
+    def write_formula(self, file):
+        """Writes the formula to a file without building it in memory."""
+        for piece in self.pieces():
+            file.write(piece)
+
+    def pieces(self, notation="formula"):
+        """
+        Yields the formula of the sentence piece by piece, or its repr if
+        `notation` is "repr".
+
+        The sentence is walked with an explicit stack, in time linear in
+        the length of the output. Whether an operand needs parentheses is
+        known from its type, instead of scanning its formula like
+        `parenthesize` does, which gives the same result unless symbol
+        names contain parentheses themselves.
+        """
+        # items are strings to output, or (mode, sentence) where mode is
+        # "formula", "repr", "operand" for a formula that may need
+        # parentheses, or "bracket" for a repr in parentheses
+        stack = [(notation, self)]
+        plain = None
+        while stack:
+            item = stack.pop()
+            if isinstance(item, str):
+                yield item
+                continue
+            mode, sentence = item
+            if mode == "operand":
+                # a single conjunct or disjunct is written on its own
+                while isinstance(sentence, (And, Or)) \
+                        and len(sentence.children()) == 1:
+                    sentence = sentence.children()[0]
+                if isinstance(sentence, (And, Or)) \
+                        and not sentence.children():
+                    continue
+            if isinstance(sentence, Symbol):
+                if mode in ("formula", "repr"):
+                    yield sentence.name
+                else:
+                    yield Sentence.parenthesize(sentence.name)
+            elif mode == "operand":
+                if plain is None:
+                    plain = not any("(" in name or ")" in name
+                                    for name in self.symbols())
+                if plain:
+                    stack += [")", ("formula", sentence), "("]
+                else:
+                    yield Sentence.parenthesize(
+                        "".join(sentence.pieces())
+                    )
+            elif mode == "bracket":
+                stack += [")", ("repr", sentence), "("]
+            elif mode == "formula":
+                stack.extend(reversed(sentence.formula_parts()))
+            else:
+                stack.extend(reversed(sentence.repr_parts()))
+
+    def formula_parts(self):
+        """
+        Returns the parts of the formula for `pieces`: strings, and
+        (mode, sentence) pairs for the operands.
+        """
+        return []
+
+    def repr_parts(self):
+        """Returns the parts of the repr for `pieces`."""
+        return []
+
+    def children(self):
+        """Returns the operands of the sentence."""
+        return ()
+
+    @classmethod
+    def operands(cls, sentence):
+        """Returns the operands of `sentence`, which must be a sentence."""
+        Sentence.validate(sentence)
+        return sentence.children()
 
     def symbols(self):
-        """Returns a set of all symbols in the logical sentence."""
-        return set()
+        """Returns a frozenset of all symbols in the logical sentence."""
+        if self._symbols is None:
+            names = set()
+            seen = set()
+            stack = [self]
+            while stack:
+                sentence = stack.pop()
+                if isinstance(sentence, Symbol):
+                    names.add(sentence.name)
+                elif sentence not in seen:
+                    seen.add(sentence)
+                    stack.extend(sentence.children())
+            return self.cache("_symbols", frozenset(names))
+        return self._symbols
 
     @classmethod
     def validate(cls, sentence):
@@ -44,14 +356,17 @@ class Sentence():
 
 class Symbol(Sentence):
 
-    def __init__(self, name):
-        self.name = name
+    __slots__ = ("name",)
 
-    def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
+    def __new__(cls, name):
+        symbol, new = cls.intern((name,), ("symbol", name))
+        if new:
+            object.__setattr__(symbol, "name", name)
+            object.__setattr__(symbol, "_symbols", frozenset((name,)))
+        return symbol
 
-    def __hash__(self):
-        return hash(("symbol", self.name))
+    def __getnewargs__(self):
+        return (self.name,)
 
     def __repr__(self):
         return self.name
@@ -62,171 +377,394 @@ class Symbol(Sentence):
         except KeyError:
             raise Exception(f"variable {self.name} not in model")
 
+    def evaluate_columns(self, columns, mask):
+        try:
+            return columns[self.name]
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
+
+    def evaluate_partial(self, model):
+        return model.get(self.name)
+
     def formula(self):
         return self.name
 
     def symbols(self):
-        return {self.name}
+        return self._symbols
 
 
 class Not(Sentence):
-    def __init__(self, operand):
-        Sentence.validate(operand)
-        self.operand = operand
 
-    def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+    __slots__ = ("operand",)
 
-    def __hash__(self):
-        return hash(("not", hash(self.operand)))
+    def __new__(cls, operand):
+        Sentence.validate(operand)
+        sentence, new = cls.intern((operand,), ("not", hash(operand)))
+        if new:
+            object.__setattr__(sentence, "operand", operand)
+        return sentence
 
-    def __repr__(self):
-        return f"Not({self.operand})"
+    def __getnewargs__(self):
+        return (self.operand,)
 
     def evaluate(self, model):
+        if self._depth > MAX_RECURSION:
+            return Sentence.evaluate(self, model)
         return not self.operand.evaluate(model)
 
-    def formula(self):
-        return "¬" + Sentence.parenthesize(self.operand.formula())
+    def evaluate_columns(self, columns, mask):
+        if self._depth > MAX_RECURSION:
+            return Sentence.evaluate_columns(self, columns, mask)
+        return mask ^ self.operand.evaluate_columns(columns, mask)
 
-    def symbols(self):
-        return self.operand.symbols()
+    def evaluate_partial(self, model):
+        if self._depth > MAX_RECURSION:
+            return Sentence.evaluate_partial(self, model)
+        value = self.operand.evaluate_partial(model)
+        return None if value is None else not value
+
+    def children(self):
+        return (self.operand,)
+
+    def formula_parts(self):
+        return ["¬", ("operand", self.operand)]
+
+    def repr_parts(self):
+        return ["Not(", ("repr", self.operand), ")"]
 
 
 class And(Sentence):
-    def __init__(self, *conjuncts):
-        for conjunct in conjuncts:
-            Sentence.validate(conjunct)
-        self.conjuncts = list(conjuncts)
 
-    def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
+    __slots__ = ("conjuncts",)
 
-    def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
+    def __new__(cls, *conjuncts):
+        for conjunct in conjuncts:
+            Sentence.validate(conjunct)
+        sentence, new = cls.intern(
+            conjuncts, ("and", tuple(hash(c) for c in conjuncts))
         )
+        if new:
+            object.__setattr__(sentence, "conjuncts", conjuncts)
+        return sentence
 
-    def __repr__(self):
-        conjunctions = ", ".join(
-            [str(conjunct) for conjunct in self.conjuncts]
-        )
-        return f"And({conjunctions})"
+    def __getnewargs__(self):
+        return self.conjuncts
 
     def add(self, conjunct):
-        Sentence.validate(conjunct)
-        self.conjuncts.append(conjunct)
+        """
+        Sentences are immutable, so a conjunct cannot be added in place.
+        Build the extended conjunction with `And(*kb.conjuncts, conjunct)`
+        or use `knowledge.KnowledgeBase.tell`.
+        """
+        raise TypeError(
+            "sentences are immutable: use And(*kb.conjuncts, conjunct) "
+            "instead of kb.add(conjunct)"
+        )
 
     def evaluate(self, model):
+        if self._depth > MAX_RECURSION:
+            return Sentence.evaluate(self, model)
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
-    def formula(self):
+    def evaluate_columns(self, columns, mask):
+        if self._depth > MAX_RECURSION:
+            return Sentence.evaluate_columns(self, columns, mask)
+        values = mask
+        for conjunct in self.conjuncts:
+            values &= conjunct.evaluate_columns(columns, mask)
+        return values
+
+    def evaluate_partial(self, model):
+        if self._depth > MAX_RECURSION:
+            return Sentence.evaluate_partial(self, model)
+        result = True
+        for conjunct in self.conjuncts:
+            value = conjunct.evaluate_partial(model)
+            if value is False:
+                return False
+            if value is None:
+                result = None
+        return result
+
+    def children(self):
+        return self.conjuncts
+
+    def formula_parts(self):
         if len(self.conjuncts) == 1:
-            return self.conjuncts[0].formula()
-        return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
-                           for conjunct in self.conjuncts])
+            return [("formula", self.conjuncts[0])]
+        return join([("operand", c) for c in self.conjuncts], " ∧ ")
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+    def repr_parts(self):
+        return ["And(", *join([("repr", c) for c in self.conjuncts], ", "),
+                ")"]
 
 
 class Or(Sentence):
-    def __init__(self, *disjuncts):
-        for disjunct in disjuncts:
-            Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
 
-    def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
+    __slots__ = ("disjuncts",)
 
-    def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
+    def __new__(cls, *disjuncts):
+        for disjunct in disjuncts:
+            Sentence.validate(disjunct)
+        sentence, new = cls.intern(
+            disjuncts, ("or", tuple(hash(d) for d in disjuncts))
         )
+        if new:
+            object.__setattr__(sentence, "disjuncts", disjuncts)
+        return sentence
 
-    def __repr__(self):
-        disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
-        return f"Or({disjuncts})"
+    def __getnewargs__(self):
+        return self.disjuncts
 
     def evaluate(self, model):
+        if self._depth > MAX_RECURSION:
+            return Sentence.evaluate(self, model)
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
-    def formula(self):
+    def evaluate_columns(self, columns, mask):
+        if self._depth > MAX_RECURSION:
+            return Sentence.evaluate_columns(self, columns, mask)
+        values = 0
+        for disjunct in self.disjuncts:
+            values |= disjunct.evaluate_columns(columns, mask)
+        return values
+
+    def evaluate_partial(self, model):
+        if self._depth > MAX_RECURSION:
+            return Sentence.evaluate_partial(self, model)
+        result = False
+        for disjunct in self.disjuncts:
+            value = disjunct.evaluate_partial(model)
+            if value is True:
+                return True
+            if value is None:
+                result = None
+        return result
+
+    def children(self):
+        return self.disjuncts
+
+    def formula_parts(self):
         if len(self.disjuncts) == 1:
-            return self.disjuncts[0].formula()
-        return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
-                            for disjunct in self.disjuncts])
+            return [("formula", self.disjuncts[0])]
+        return join([("operand", d) for d in self.disjuncts], " ∨  ")
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+    def repr_parts(self):
+        return ["Or(", *join([("repr", d) for d in self.disjuncts], ", "),
+                ")"]
 
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
-        Sentence.validate(antecedent)
-        Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
 
-    def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
+    __slots__ = ("antecedent", "consequent")
 
-    def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+    def __new__(cls, antecedent, consequent):
+        Sentence.validate(antecedent)
+        Sentence.validate(consequent)
+        sentence, new = cls.intern(
+            (antecedent, consequent),
+            ("implies", hash(antecedent), hash(consequent))
+        )
+        if new:
+            object.__setattr__(sentence, "antecedent", antecedent)
+            object.__setattr__(sentence, "consequent", consequent)
+        return sentence
 
-    def __repr__(self):
-        return f"Implication({self.antecedent}, {self.consequent})"
+    def __getnewargs__(self):
+        return (self.antecedent, self.consequent)
 
     def evaluate(self, model):
+        if self._depth > MAX_RECURSION:
+            return Sentence.evaluate(self, model)
         return ((not self.antecedent.evaluate(model))
                 or self.consequent.evaluate(model))
 
-    def formula(self):
-        antecedent = Sentence.parenthesize(self.antecedent.formula())
-        consequent = Sentence.parenthesize(self.consequent.formula())
-        return f"{antecedent} => {consequent}"
+    def evaluate_columns(self, columns, mask):
+        if self._depth > MAX_RECURSION:
+            return Sentence.evaluate_columns(self, columns, mask)
+        return ((mask ^ self.antecedent.evaluate_columns(columns, mask))
+                | self.consequent.evaluate_columns(columns, mask))
+
+    def evaluate_partial(self, model):
+        if self._depth > MAX_RECURSION:
+            return Sentence.evaluate_partial(self, model)
+        antecedent = self.antecedent.evaluate_partial(model)
+        if antecedent is False:
+            return True
+        consequent = self.consequent.evaluate_partial(model)
+        if consequent is True:
+            return True
+        if antecedent is None or consequent is None:
+            return None
+        return False
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+    def children(self):
+        return (self.antecedent, self.consequent)
+
+    def formula_parts(self):
+        return [("operand", self.antecedent), " => ",
+                ("operand", self.consequent)]
+
+    def repr_parts(self):
+        return ["Implication(", ("repr", self.antecedent), ", ",
+                ("repr", self.consequent), ")"]
 
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
-        Sentence.validate(left)
-        Sentence.validate(right)
-        self.left = left
-        self.right = right
 
-    def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
+    __slots__ = ("left", "right")
 
-    def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+    def __new__(cls, left, right):
+        Sentence.validate(left)
+        Sentence.validate(right)
+        sentence, new = cls.intern(
+            (left, right), ("biconditional", hash(left), hash(right))
+        )
+        if new:
+            object.__setattr__(sentence, "left", left)
+            object.__setattr__(sentence, "right", right)
+        return sentence
 
-    def __repr__(self):
-        return f"Biconditional({self.left}, {self.right})"
+    def __getnewargs__(self):
+        return (self.left, self.right)
 
     def evaluate(self, model):
+        if self._depth > MAX_RECURSION:
+            return Sentence.evaluate(self, model)
         return ((self.left.evaluate(model)
                  and self.right.evaluate(model))
                 or (not self.left.evaluate(model)
                     and not self.right.evaluate(model)))
 
-    def formula(self):
-        left = Sentence.parenthesize(str(self.left))
-        right = Sentence.parenthesize(str(self.right))
-        return f"{left} <=> {right}"
-
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
-
-
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+    def evaluate_columns(self, columns, mask):
+        if self._depth > MAX_RECURSION:
+            return Sentence.evaluate_columns(self, columns, mask)
+        return mask ^ (self.left.evaluate_columns(columns, mask)
+                       ^ self.right.evaluate_columns(columns, mask))
+
+    def evaluate_partial(self, model):
+        if self._depth > MAX_RECURSION:
+            return Sentence.evaluate_partial(self, model)
+        left = self.left.evaluate_partial(model)
+        if left is None:
+            return None
+        right = self.right.evaluate_partial(model)
+        if right is None:
+            return None
+        return left == right
+
+    def children(self):
+        return (self.left, self.right)
+
+    def formula_parts(self):
+        # the operands are written as their repr, in parentheses
+        return [("bracket", self.left), " <=> ", ("bracket", self.right)]
+
+    def repr_parts(self):
+        return ["Biconditional(", ("repr", self.left), ", ",
+                ("repr", self.right), ")"]
+
+
+def join(items, separator):
+    """Returns the items with `separator` between each two of them."""
+    parts = []
+    for item in items:
+        if parts:
+            parts.append(separator)
+        parts.append(item)
+    return parts
+
+
+def postorder(root, combine, children=None, done=None):
+    """
+    Returns `combine(node, results)` for `root`, where `results` are the
+    results of the nodes `children(node)`, by default the operands of a
+    sentence. Nodes are combined bottom up with an explicit stack, so that
+    deep sentences do not overflow Python's stack, children from left to
+    right, and every node only once: its result is kept in the dict `done`.
+    """
+    if children is None:
+        children = Sentence.operands
+    if done is None:
+        done = dict()
+    stack = [(root, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if node in done:
+            continue
+        if expanded:
+            done[node] = combine(node, [done[child]
+                                        for child in children(node)])
+        else:
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(children(node))
+                         if child not in done)
+    return done[root]
+
+
+def flatten(sentence):
+    """
+    Returns the distinct sub-sentences of `sentence` as a list of
+    (class, arguments) pairs, operands before the sentences using them,
+    where the arguments of a compound sentence are positions in the list.
+    """
+    nodes = []
+
+    def number(sentence, operands):
+        if isinstance(sentence, Symbol):
+            nodes.append((Symbol, (sentence.name,)))
+        else:
+            nodes.append((sentence.__class__, tuple(operands)))
+        return len(nodes) - 1
+
+    postorder(sentence, number)
+    return nodes
+
+
+def rebuild(nodes):
+    """Returns the sentence of a list of nodes from `flatten`."""
+    built = []
+    for cls, args in nodes:
+        if cls is not Symbol:
+            args = [built[i] for i in args]
+        built.append(cls(*args))
+    return built[-1]
+
+
+def model_check(knowledge, query, engine="enumerate", workers=1):
+    """Checks if knowledge base entails query.
+
+    `engine` picks how:
+        "enumerate" checks that query is true in every model of knowledge;
+        "prune" does the same on partial models, skipping those that
+            already decide knowledge and query;
+        "compiled" does the same with both compiled into one function;
+        "vector" does the same on whole truth tables packed into integers;
+        "sat" checks with a SAT solver that knowledge ∧ ¬query has no model.
+
+    With `workers` above 1, the "enumerate" and "compiled" engines split
+    the models into subspaces checked by that many processes.
+    """
+
+    if workers > 1:
+        if engine not in ("enumerate", "compiled"):
+            raise ValueError(f"engine {engine} does not run on workers")
+        from parallel import entails
+        return entails(knowledge, query, workers)
+    if engine == "prune":
+        from prune import entails
+        return entails(knowledge, query)
+    elif engine == "compiled":
+        from compiler import entails
+        return entails(knowledge, query)
+    elif engine == "vector":
+        from vector import entails
+        return entails(knowledge, query)
+    elif engine == "sat":
+        from sat import entails
+        return entails(knowledge, query)
+    elif engine != "enumerate":
+        raise ValueError(f"unknown engine {engine}")
 
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
@@ -257,7 +795,58 @@ def model_check(knowledge, query):
                     check_all(knowledge, query, remaining, model_false))
 
     # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
+    symbols = set(knowledge.symbols() | query.symbols())
 
     # Check that knowledge entails query
     return check_all(knowledge, query, symbols, dict())
+
+
+def model_check_many(knowledge, queries, engine="enumerate"):
+    """Checks which of the queries the knowledge base entails.
+
+    Returns a list with one boolean per query. The models of the knowledge
+    base are found once and shared by all queries, instead of once per
+    query. `engine` is one of the engines of `model_check`.
+    """
+
+    queries = list(queries)
+    if engine == "prune":
+        from prune import entails_many
+        return entails_many(knowledge, queries)
+    elif engine == "compiled":
+        from compiler import entails_many
+        return entails_many(knowledge, queries)
+    elif engine == "vector":
+        from vector import entails_many
+        return entails_many(knowledge, queries)
+    elif engine == "sat":
+        from sat import entails_many
+        return entails_many(knowledge, queries)
+    elif engine != "enumerate":
+        raise ValueError(f"unknown engine {engine}")
+
+    def models(symbols, model):
+        """Yields every model of the knowledge base extending model."""
+        if not symbols:
+            if knowledge.evaluate(model):
+                yield model
+        else:
+            remaining = symbols.copy()
+            p = remaining.pop()
+            for value in (True, False):
+                extended = model.copy()
+                extended[p] = value
+                yield from models(remaining, extended)
+
+    # Get all symbols in knowledge and every query
+    symbols = set(knowledge.symbols().union(
+        *[query.symbols() for query in queries]
+    ))
+
+    # A query is entailed until a model of knowledge makes it false
+    entailed = [True] * len(queries)
+    for model in models(symbols, dict()):
+        for i, query in enumerate(queries):
+            if entailed[i] and not query.evaluate(model):
+                entailed[i] = False
+    return entailed
@@ -0,0 +1,97 @@
+"""
+Model checking split over processes.
+
+The first symbols are fixed to every combination of values, a prefix,
+and the models extending each prefix are checked by a pool of worker
+processes. Every worker compiles knowledge => query once, and all stop as
+soon as one of them finds a model where it is false.
+"""
+
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed, wait
+
+from compiler import Compiled
+from logic import Implication
+
+# prefixes per worker, so that workers that finish early get more work
+TASKS_PER_WORKER = 8
+
+# models checked between two looks at the stop event
+BLOCK = 4096
+
+# pools and their stop events, by number of workers
+executors = dict()
+
+# in a worker process: the stop event of its pool, and the compiled
+# check of the sentences it was last asked about
+stop = None
+compiled = dict()
+
+
+def process_pool(workers):
+    if workers not in executors:
+        event = multiprocessing.Event()
+        executor = ProcessPoolExecutor(max_workers=workers,
+                                       initializer=start_worker,
+                                       initargs=(event,))
+        executors[workers] = executor, event
+    return executors[workers]
+
+
+def start_worker(event):
+    global stop
+    stop = event
+
+
+def check_prefix(knowledge, query, symbols, bits, prefix):
+    """
+    Checks knowledge => query in the models where symbol i of the first
+    `bits` symbols has the value of bit i of `prefix`. Returns False if
+    there is a counter-model, True if there is none, and None if the
+    check was stopped.
+    """
+    key = (knowledge, query, tuple(symbols))
+    if key not in compiled:
+        compiled.clear()
+        compiled[key] = Compiled(Implication(knowledge, query),
+                                 symbols).function
+    check = compiled[key]
+    # the fixed symbols have a single value to choose from
+    values = [(bool(prefix >> i & 1),) for i in range(bits)]
+    values += [(True, False)] * (len(symbols) - bits)
+    models = itertools.product(*values)
+    remaining = 1 << (len(symbols) - bits)
+    while remaining > 0:
+        if stop.is_set():
+            return None
+        if not all(map(check, itertools.islice(models, BLOCK))):
+            stop.set()
+            return False
+        remaining -= BLOCK
+    return True
+
+
+def entails(knowledge, query, workers):
+    """
+    Checks if knowledge base entails query with `workers` processes.
+    """
+    symbols = sorted(knowledge.symbols() | query.symbols())
+    bits = min(len(symbols), (workers * TASKS_PER_WORKER - 1).bit_length())
+    executor, event = process_pool(workers)
+    event.clear()
+    futures = [
+        executor.submit(check_prefix, knowledge, query, symbols, bits, prefix)
+        for prefix in range(1 << bits)
+    ]
+    entailed = True
+    for future in as_completed(futures):
+        if future.result() is False:
+            entailed = False
+            event.set()
+            break
+    # let stopped workers finish before the event is cleared again
+    for future in futures:
+        future.cancel()
+    wait(futures)
+    return entailed
@@ -0,0 +1,407 @@
+"""
+Text format and DIMACS input and output for logical sentences.
+
+A sentence is written with the connectives of `Sentence.formula`, or
+their ASCII forms, from tightest to loosest binding:
+
+    ¬ ~ !       not
+    ∧ &         and
+    ∨ |         or
+    => ->       implies (right associative)
+    <=> <->     if and only if (right associative)
+    ⊤ ⊥         true and false
+
+Symbol names are everything between connectives and parentheses, with
+surrounding whitespace removed, so "A is a Knight ∧ ¬B is a Knave" has
+the symbols "A is a Knight" and "B is a Knave".
+
+A knowledge base file has one sentence per line, and lines starting
+with "#" are comments. Files are read line by line, so they are never
+held in memory as a whole.
+
+    python3 parsing.py [--megabytes 4]
+
+reports how fast generated files are parsed.
+"""
+
+import argparse
+import random
+import re
+import sys
+import tempfile
+import time
+from array import array
+
+from cnf import Clauses
+from logic import Symbol, Not, And, Or, Implication, Biconditional
+
+# a connective, parenthesis or constant; a symbol name; anything else
+TOKEN = re.compile(r"""
+    \s*(?:
+        (<=>|<->|=>|->|[¬~!∧&∨|()⊤⊥])
+      | ((?:[^\s¬~!∧&∨|()<=>⊤⊥-]|-(?!>))+
+         (?:\s+(?:[^\s¬~!∧&∨|()<=>⊤⊥-]|-(?!>))+)*)
+      | (\S)
+    )
+""", re.VERBOSE)
+
+# connectives, by their spellings
+OPERATORS = {
+    "¬": "not", "~": "not", "!": "not",
+    "∧": "and", "&": "and",
+    "∨": "or", "|": "or",
+    "=>": "implies", "->": "implies",
+    "<=>": "iff", "<->": "iff",
+}
+
+# binding strength of the binary connectives
+PRECEDENCE = {"and": 3, "or": 2, "implies": 1, "iff": 0}
+RIGHT_ASSOCIATIVE = {"implies", "iff"}
+
+CONSTANTS = {"⊤": And(), "⊥": Or()}
+
+
+class Operand():
+    """
+    An operand of the parser. Chains of the same n-ary connective are
+    collected in `operands` and only built into one sentence when used,
+    so "a ∧ b ∧ c" becomes And(a, b, c) without intermediate sentences.
+    """
+
+    __slots__ = ("operator", "operands")
+
+    def __init__(self, operator, operands):
+        self.operator = operator
+        self.operands = operands
+
+    def sentence(self):
+        if self.operator == "and":
+            return And(*self.operands)
+        if self.operator == "or":
+            return Or(*self.operands)
+        return self.operands[0]
+
+
+def parse(text):
+    """
+    Returns the sentence written in `text`. Raises ValueError if it is not
+    a well-formed sentence.
+    """
+    operands = []
+    # pending connectives and open parentheses
+    operators = []
+    expect_operand = True
+
+    def reduce():
+        operator = operators.pop()
+        if operator == "not":
+            operand = operands.pop().sentence()
+            operands.append(Operand(None, [Not(operand)]))
+            return
+        right = operands.pop().sentence()
+        left = operands.pop()
+        if operator in ("and", "or"):
+            if left.operator == operator:
+                left.operands.append(right)
+                operands.append(left)
+            else:
+                operands.append(Operand(operator, [left.sentence(), right]))
+        elif operator == "implies":
+            operands.append(
+                Operand(None, [Implication(left.sentence(), right)])
+            )
+        else:
+            operands.append(
+                Operand(None, [Biconditional(left.sentence(), right)])
+            )
+
+    for token, name, unexpected in TOKEN.findall(text):
+        if unexpected:
+            raise ValueError(f"unexpected {unexpected!r} in {text!r}")
+
+        if expect_operand:
+            if name:
+                operands.append(Operand(None, [Symbol(name)]))
+                expect_operand = False
+            elif token in CONSTANTS:
+                operands.append(Operand(None, [CONSTANTS[token]]))
+                expect_operand = False
+            elif token == "(":
+                operators.append("(")
+            elif OPERATORS.get(token) == "not":
+                operators.append("not")
+            else:
+                raise ValueError(f"expected a sentence at {token!r}: {text!r}")
+        elif token == ")":
+            while operators and operators[-1] != "(":
+                reduce()
+            if not operators:
+                raise ValueError(f"unbalanced ) in {text!r}")
+            operators.pop()
+            # a parenthesized chain is not extended by the connectives
+            # around it
+            operands.append(Operand(None, [operands.pop().sentence()]))
+        elif token in OPERATORS and OPERATORS[token] != "not":
+            operator = OPERATORS[token]
+            precedence = PRECEDENCE[operator]
+            while operators and operators[-1] != "(" and (
+                operators[-1] == "not"
+                or PRECEDENCE[operators[-1]] > precedence
+                or (PRECEDENCE[operators[-1]] == precedence
+                    and operator not in RIGHT_ASSOCIATIVE)
+            ):
+                reduce()
+            operators.append(operator)
+            expect_operand = True
+        else:
+            raise ValueError(
+                f"expected a connective at {token or name!r}: {text!r}"
+            )
+
+    if expect_operand:
+        raise ValueError(f"incomplete sentence: {text!r}")
+    while operators:
+        if operators[-1] == "(":
+            raise ValueError(f"unbalanced ( in {text!r}")
+        reduce()
+    return operands.pop().sentence()
+
+
+def unparse(sentence):
+    """
+    Returns `sentence` in the text format, so that `parse` returns it
+    again, except that a conjunction or disjunction of a single operand
+    comes back as that operand.
+    """
+    return "".join(pieces(sentence))
+
+
+def operand(sentence):
+    """Returns `sentence` in the text format, parenthesized if needed."""
+    return "".join(pieces(sentence, parenthesize=True))
+
+
+def constant(sentence):
+    """
+    Returns the text of `sentence` if it is written as a constant, such
+    as a conjunction of the empty conjunction, and None otherwise.
+    """
+    while isinstance(sentence, (And, Or)) and len(sentence.children()) == 1:
+        sentence = sentence.children()[0]
+    if isinstance(sentence, (And, Or)) and not sentence.children():
+        return "⊤" if isinstance(sentence, And) else "⊥"
+    if isinstance(sentence, Symbol) and sentence.name in CONSTANTS:
+        return sentence.name
+    return None
+
+
+def pieces(sentence, parenthesize=False):
+    """
+    Yields the text of `sentence` piece by piece, in parentheses if
+    `parenthesize` and it needs them as an operand. The sentence is walked
+    with an explicit stack, so deep sentences do not overflow Python's
+    stack.
+    """
+    # items are strings to output, or (parenthesize, sentence)
+    stack = [(parenthesize, sentence)]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            yield item
+            continue
+        parenthesize, sentence = item
+        if parenthesize and not isinstance(sentence, (Symbol, Not)):
+            text = constant(sentence)
+            if text is not None:
+                yield text
+            else:
+                stack += [")", (False, sentence), "("]
+            continue
+        if isinstance(sentence, Symbol):
+            parts = [sentence.name]
+        elif isinstance(sentence, Not):
+            parts = ["¬", (True, sentence.operand)]
+        elif isinstance(sentence, (And, Or)):
+            operands = sentence.children()
+            if not operands:
+                parts = ["⊤" if isinstance(sentence, And) else "⊥"]
+            else:
+                separator = " ∧ " if isinstance(sentence, And) else " ∨ "
+                parts = []
+                for child in operands:
+                    if parts:
+                        parts.append(separator)
+                    parts.append((True, child))
+        elif isinstance(sentence, Implication):
+            parts = [(True, sentence.antecedent), " => ",
+                     (True, sentence.consequent)]
+        elif isinstance(sentence, Biconditional):
+            parts = [(True, sentence.left), " <=> ", (True, sentence.right)]
+        else:
+            raise TypeError("must be a logical sentence")
+        stack.extend(reversed(parts))
+
+
+def read(file):
+    """
+    Yields the sentences of a knowledge base file, one per line.
+    """
+    for number, line in enumerate(file, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            yield parse(line)
+        except ValueError as error:
+            raise ValueError(f"line {number}: {error}") from None
+
+
+def load(path):
+    """
+    Returns the knowledge base in the file at `path`, as the conjunction
+    of its sentences.
+    """
+    with open(path, encoding="utf-8") as file:
+        return And(*read(file))
+
+
+def dump(sentences, path):
+    """
+    Writes sentences to a knowledge base file at `path`, one per line.
+    """
+    with open(path, "w", encoding="utf-8") as file:
+        for sentence in sentences:
+            file.write(unparse(sentence))
+            file.write("\n")
+
+
+def read_dimacs(file):
+    """
+    Returns the clauses of a DIMACS CNF file as `cnf.Clauses`, and the
+    number of variables declared in its header.
+    """
+    clauses = Clauses()
+    variables = 0
+    literals = clauses.literals
+    for line in file:
+        first = line.lstrip()[:1]
+        if first in ("", "c"):
+            continue
+        # some benchmark files end with "%" and a stray "0"
+        if first == "%":
+            break
+        if first == "p":
+            _, form, count, _ = line.split()
+            if form != "cnf":
+                raise ValueError(f"not a CNF file: {line.strip()}")
+            variables = int(count)
+            continue
+        # the body is already literals ended by 0, like `Clauses`
+        literals.extend(array("i", map(int, line.split())))
+    if literals and literals[-1] != 0:
+        raise ValueError("last clause is not ended by 0")
+    clauses.count = literals.count(0)
+    return clauses, variables
+
+
+def write_dimacs(clauses, file, variables=None, names=None):
+    """
+    Writes clauses (a `cnf.Clauses` or lists of literals) to a file in the
+    DIMACS CNF format. `names` lists the name of every variable, as
+    `Encoder.names` does, and is written in comments.
+    """
+    if variables is None:
+        variables = max((abs(literal) for clause in clauses
+                         for literal in clause), default=0)
+    for var, name in enumerate(names or []):
+        if name is not None:
+            file.write(f"c {var} {name}\n")
+    file.write(f"p cnf {variables} {len(clauses)}\n")
+    for clause in clauses:
+        file.write(" ".join(map(str, clause)))
+        file.write(" 0\n" if clause else "0\n")
+
+
+def sentence_of(clauses, names=None):
+    """
+    Returns the conjunction of clauses. Variable v is the symbol
+    `names[v]` if given, otherwise the symbol named after its number.
+    """
+    def symbol(var):
+        if names and var < len(names) and names[var] is not None:
+            return Symbol(names[var])
+        return Symbol(str(var))
+
+    return And(*[
+        Or(*[symbol(l) if l > 0 else Not(symbol(-l)) for l in clause])
+        for clause in clauses
+    ])
+
+
+def random_sentence(rng, symbols, depth):
+    if depth == 0 or rng.random() < 0.3:
+        return rng.choice(symbols)
+    kind = rng.randrange(5)
+    if kind == 0:
+        return Not(random_sentence(rng, symbols, depth - 1))
+    if kind in (1, 2):
+        connective = And if kind == 1 else Or
+        return connective(*[random_sentence(rng, symbols, depth - 1)
+                            for _ in range(rng.randint(2, 4))])
+    connective = Implication if kind == 3 else Biconditional
+    return connective(random_sentence(rng, symbols, depth - 1),
+                      random_sentence(rng, symbols, depth - 1))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse throughput report")
+    parser.add_argument("--megabytes", type=float, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    symbols = [Symbol(f"{i} is a Knight") for i in range(200)]
+    size = int(args.megabytes * 2 ** 20)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = f"{directory}/knowledge.txt"
+        written = 0
+        count = 0
+        with open(path, "w", encoding="utf-8") as file:
+            while written < size:
+                line = unparse(random_sentence(rng, symbols, 4)) + "\n"
+                file.write(line)
+                written += len(line.encode())
+                count += 1
+        start = time.perf_counter()
+        knowledge = load(path)
+        elapsed = time.perf_counter() - start
+        print(f"text:   {written / 2 ** 20:.1f} MB, {count} sentences "
+              f"in {elapsed:.2f}s, {written / 2 ** 20 / elapsed:.2f} MB/s, "
+              f"{count / elapsed:.0f} sentences/s")
+
+        path = f"{directory}/knowledge.cnf"
+        variables = 2000
+        with open(path, "w") as file:
+            file.write(f"p cnf {variables} 0\n")
+            written = 0
+            count = 0
+            while written < size:
+                literals = [rng.randint(1, variables) * rng.choice((1, -1))
+                            for _ in range(3)]
+                line = " ".join(map(str, literals)) + " 0\n"
+                file.write(line)
+                written += len(line)
+                count += 1
+        start = time.perf_counter()
+        with open(path) as file:
+            clauses, _ = read_dimacs(file)
+        elapsed = time.perf_counter() - start
+        print(f"DIMACS: {written / 2 ** 20:.1f} MB, {len(clauses)} clauses "
+              f"in {elapsed:.2f}s, {written / 2 ** 20 / elapsed:.2f} MB/s, "
+              f"{len(clauses) / elapsed:.0f} clauses/s")
+    return 0 if len(knowledge.conjuncts) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""
+Model enumeration that prunes partial models.
+
+Like the "enumerate" engine, symbols are assigned one at a time, but the
+knowledge base is evaluated after every assignment with the remaining
+symbols unknown. A branch where the knowledge base is already false has
+no models and is cut, and once it is true, every query that is already
+decided needs no further branching.
+"""
+
+from collections import Counter
+
+from logic import Sentence, Symbol
+
+
+def occurrences(sentence):
+    """
+    Returns how often each symbol occurs in `sentence`, counting every
+    distinct sub-sentence once.
+    """
+    counts = Counter()
+    seen = set()
+    # walked with an explicit stack, so deep sentences do not overflow
+    # Python's stack
+    stack = [sentence]
+    while stack:
+        sentence = stack.pop()
+        if isinstance(sentence, Symbol):
+            counts[sentence.name] += 1
+        elif not isinstance(sentence, Sentence):
+            raise TypeError("must be a logical sentence")
+        elif sentence not in seen:
+            seen.add(sentence)
+            stack.extend(sentence.children())
+    return counts
+
+
+def order(knowledge, queries):
+    """
+    Returns the symbols to branch on: those of the knowledge base first,
+    most frequent first, so that it is decided early, then the rest.
+    """
+    counts = occurrences(knowledge)
+    symbols = sorted(counts, key=lambda name: (-counts[name], name))
+    rest = set().union(*[query.symbols() for query in queries])
+    return symbols + sorted(rest - counts.keys())
+
+
+def entails(knowledge, query):
+    """
+    Checks if knowledge base entails query.
+    """
+    return entails_many(knowledge, [query])[0]
+
+
+def entails_many(knowledge, queries):
+    """
+    Checks which of the queries knowledge base entails, enumerating the
+    models of knowledge once for all of them.
+    """
+    symbols = order(knowledge, queries)
+    entailed = [True] * len(queries)
+    # the partial model, extended and undone in place
+    model = dict()
+
+    def narrow(pending):
+        """
+        Returns the queries in `pending` that the models extending `model`
+        still need to be searched for.
+        """
+        known = knowledge.evaluate_partial(model)
+        if known is False:
+            return []
+        if known is True:
+            # every extension is a model, so decided queries are done
+            undecided = []
+            for i in pending:
+                value = queries[i].evaluate_partial(model)
+                if value is False:
+                    entailed[i] = False
+                elif value is None:
+                    undecided.append(i)
+            pending = undecided
+        return [i for i in pending if entailed[i]]
+
+    # frames are [depth, pending queries, next value of symbols[depth]],
+    # searched with an explicit stack rather than one call per symbol
+    stack = []
+    pending = narrow(list(range(len(queries))))
+    if pending:
+        stack.append([0, pending, 0])
+    while stack and any(entailed):
+        frame = stack[-1]
+        depth, pending, step = frame
+        name = symbols[depth]
+        if step == 2:
+            del model[name]
+            stack.pop()
+            continue
+        frame[2] = step + 1
+        model[name] = step == 0
+        pending = narrow(pending)
+        if pending:
+            stack.append([depth + 1, pending, 0])
+    return entailed
@@ -0,0 +1,344 @@
+"""
+CDCL SAT solver, used to decide entailment without enumerating models.
+"""
+
+import heapq
+
+from cnf import Encoder
+from logic import Not
+
+# activity decay of the variable ordering after every conflict
+DECAY = 0.95
+
+# conflicts before the first restart, and growth of the restart interval
+RESTART_FIRST = 100
+RESTART_GROWTH = 1.5
+
+
+class Solver():
+    """
+    Conflict-driven clause learning SAT solver.
+
+    Clauses are lists of integer literals. Unit propagation uses two
+    watched literals per clause (the first two of the list), conflicts are
+    analysed to their first unique implication point and learned as new
+    clauses, and decisions follow variable activity (VSIDS) with saved
+    phases and periodic restarts.
+
+    Clauses can be added between calls to `solve`, and learned clauses
+    are kept, so a solver can answer a series of related questions.
+    """
+
+    def __init__(self):
+        self.clauses = []
+        self.learned = []
+        # clauses watching a literal, by literal
+        self.watches = dict()
+        # per variable: 1 true, -1 false, 0 unassigned
+        self.value = [0]
+        # the same per literal, so propagation needs no sign checks
+        self.truth = {0: 0}
+        self.level = [0]
+        self.reason = [None]
+        self.activity = [0.0]
+        self.phase = [-1]
+        self.heap = []
+        self.increment = 1.0
+        # assigned literals in order, and where each decision level starts
+        self.trail = []
+        self.trail_lim = []
+        self.head = 0
+        # False once the clauses are unsatisfiable without assumptions
+        self.ok = True
+        self.model = None
+        self.conflicts = 0
+
+    def variables(self):
+        return len(self.value) - 1
+
+    def reserve(self, count):
+        """Makes sure variables 1 to `count` exist."""
+        while len(self.value) <= count:
+            var = len(self.value)
+            self.value.append(0)
+            self.truth[var] = self.truth[-var] = 0
+            self.level.append(0)
+            self.reason.append(None)
+            self.activity.append(0.0)
+            self.phase.append(-1)
+            heapq.heappush(self.heap, (0.0, var))
+
+    def value_of(self, literal):
+        return self.truth[literal]
+
+    def add_clause(self, literals):
+        """
+        Adds a clause. Returns False if the clauses have become
+        unsatisfiable.
+        """
+        if not self.ok:
+            return False
+        self.backtrack(0)
+        self.reserve(max((abs(literal) for literal in literals), default=0))
+
+        clause = []
+        for literal in literals:
+            value = self.value_of(literal)
+            # satisfied already, or a tautology
+            if value == 1 or -literal in clause:
+                return True
+            if value == 0 and literal not in clause:
+                clause.append(literal)
+
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            self.assign(clause[0], None)
+            self.ok = self.propagate() is None
+        else:
+            self.clauses.append(clause)
+            self.watch(clause)
+        return self.ok
+
+    def watch(self, clause):
+        self.watches.setdefault(clause[0], []).append(clause)
+        self.watches.setdefault(clause[1], []).append(clause)
+
+    def assign(self, literal, reason):
+        var = abs(literal)
+        self.value[var] = 1 if literal > 0 else -1
+        self.truth[literal] = 1
+        self.truth[-literal] = -1
+        self.level[var] = len(self.trail_lim)
+        self.reason[var] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """
+        Assigns all literals implied by unit clauses. Returns a clause
+        with all literals false if there is a conflict, otherwise None.
+        """
+        truth = self.truth
+        watches = self.watches
+        trail = self.trail
+        while self.head < len(trail):
+            false = -trail[self.head]
+            self.head += 1
+            watchers = watches.get(false)
+            if not watchers:
+                continue
+
+            kept = 0
+            for index in range(len(watchers)):
+                clause = watchers[index]
+                # keep the false literal in the second position
+                if clause[0] == false:
+                    clause[0], clause[1] = clause[1], false
+                first = clause[0]
+                first_value = truth[first]
+                if first_value == 1:
+                    watchers[kept] = clause
+                    kept += 1
+                    continue
+
+                # look for another literal to watch
+                for k in range(2, len(clause)):
+                    literal = clause[k]
+                    if truth[literal] != -1:
+                        clause[1], clause[k] = literal, false
+                        watches.setdefault(literal, []).append(clause)
+                        break
+                else:
+                    watchers[kept] = clause
+                    kept += 1
+                    if first_value == -1:
+                        # conflict: keep the remaining watchers
+                        for rest in range(index + 1, len(watchers)):
+                            watchers[kept] = watchers[rest]
+                            kept += 1
+                        del watchers[kept:]
+                        self.head = len(trail)
+                        return clause
+                    self.assign(first, clause)
+            del watchers[kept:]
+        return None
+
+    def analyze(self, conflict):
+        """
+        Returns the clause learned from a conflict, with the literal that
+        becomes unit first, and the level to jump back to.
+        """
+        level = self.level
+        current = len(self.trail_lim)
+        seen = set()
+        learned = [None]
+        pending = 0
+        literal = None
+        index = len(self.trail) - 1
+        clause = conflict
+        while True:
+            for other in clause:
+                var = abs(other)
+                if other == literal or var in seen or level[var] == 0:
+                    continue
+                seen.add(var)
+                self.bump(var)
+                if level[var] == current:
+                    pending += 1
+                else:
+                    learned.append(other)
+            # the most recent literal of the conflict on the trail
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            seen.discard(abs(literal))
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.reason[abs(literal)]
+        learned[0] = -literal
+
+        if len(learned) == 1:
+            return learned, 0
+        # watch the literal of the highest level besides the first
+        highest = max(range(1, len(learned)),
+                      key=lambda i: level[abs(learned[i])])
+        learned[1], learned[highest] = learned[highest], learned[1]
+        return learned, level[abs(learned[1])]
+
+    def bump(self, var):
+        self.activity[var] += self.increment
+        if self.activity[var] > 1e100:
+            # rescale before the activities overflow
+            self.activity = [a * 1e-100 for a in self.activity]
+            self.increment *= 1e-100
+            self.heap = [(-self.activity[v], v)
+                         for v in range(1, len(self.value))
+                         if not self.value[v]]
+            heapq.heapify(self.heap)
+
+    def backtrack(self, level):
+        """Undoes all assignments above decision level `level`."""
+        if len(self.trail_lim) <= level:
+            return
+        start = self.trail_lim[level]
+        for literal in self.trail[start:]:
+            var = abs(literal)
+            self.phase[var] = self.value[var]
+            self.value[var] = 0
+            self.truth[literal] = self.truth[-literal] = 0
+            self.reason[var] = None
+            heapq.heappush(self.heap, (-self.activity[var], var))
+        del self.trail[start:]
+        del self.trail_lim[level:]
+        self.head = len(self.trail)
+
+    def decide(self):
+        """Returns the unassigned variable with the highest activity."""
+        while self.heap:
+            _, var = heapq.heappop(self.heap)
+            if not self.value[var]:
+                return var
+        return None
+
+    def solve(self, assumptions=()):
+        """
+        Returns True if the clauses are satisfiable with all literals in
+        `assumptions` true, and stores a satisfying assignment in
+        `self.model` (by variable: 1 true, -1 false). Returns False
+        otherwise.
+        """
+        self.model = None
+        if not self.ok:
+            return False
+        self.backtrack(0)
+        self.reserve(max((abs(literal) for literal in assumptions),
+                         default=0))
+        if self.propagate() is not None:
+            self.ok = False
+            return False
+
+        restart = RESTART_FIRST
+        conflicts = 0
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                conflicts += 1
+                if not self.trail_lim:
+                    self.ok = False
+                    return False
+                learned, level = self.analyze(conflict)
+                self.backtrack(level)
+                if len(learned) == 1:
+                    self.assign(learned[0], None)
+                else:
+                    self.learned.append(learned)
+                    self.watch(learned)
+                    self.assign(learned[0], learned)
+                self.increment /= DECAY
+                continue
+
+            if conflicts >= restart:
+                conflicts = 0
+                restart *= RESTART_GROWTH
+                self.backtrack(0)
+                continue
+
+            # assumptions are the first decisions
+            level = len(self.trail_lim)
+            if level < len(assumptions):
+                literal = assumptions[level]
+                value = self.value_of(literal)
+                if value == -1:
+                    self.backtrack(0)
+                    return False
+                self.trail_lim.append(len(self.trail))
+                if value == 0:
+                    self.assign(literal, None)
+                continue
+
+            var = self.decide()
+            if var is None:
+                self.model = self.value.copy()
+                self.backtrack(0)
+                return True
+            self.trail_lim.append(len(self.trail))
+            self.assign(var if self.phase[var] == 1 else -var, None)
+
+
+def entails(knowledge, query):
+    """
+    Checks if knowledge base entails query, by checking that
+    knowledge ∧ ¬query has no model.
+    """
+    encoder = Encoder()
+    encoder.add(knowledge)
+    encoder.add(Not(query))
+    solver = Solver()
+    for clause in encoder.clauses:
+        if not solver.add_clause(clause):
+            return True
+    return not solver.solve()
+
+
+def entails_many(knowledge, queries):
+    """
+    Checks which of the queries knowledge base entails. The knowledge base
+    is encoded into one solver, which is then asked for a model with each
+    query false in turn, keeping what it learned between queries.
+    """
+    encoder = Encoder()
+    encoder.add(knowledge)
+    solver = Solver()
+    added = 0
+    entailed = []
+    for query in queries:
+        literal = encoder.literal(query)
+        # only the definitions of the new query need to be added
+        for clause in encoder.clauses.iterate(added):
+            solver.add_clause(clause)
+        added = len(encoder.clauses.literals)
+        entailed.append(not solver.solve([-literal]))
+    return entailed
@@ -0,0 +1,80 @@
+"""
+Truth-table evaluation of logical sentences, many models at a time.
+
+The models over a list of symbols are numbered, and the values of a
+sentence in a block of models are packed into the bits of one integer,
+so every connective is a single bitwise operation on the whole block.
+"""
+
+# models per block: 2 ** CHUNK_BITS, so each column is 128 KiB at most
+CHUNK_BITS = 20
+
+
+def columns(symbols, bits):
+    """
+    Returns the columns of the first `bits` symbols over the 2 ** bits
+    models of a block, and the mask of the block: symbol i is true in
+    the models whose number has bit i set.
+    """
+    size = 1 << bits
+    mask = (1 << size) - 1
+    result = dict()
+    for i, name in enumerate(symbols[:bits]):
+        half = 1 << i
+        # false in the lower half of each period of 2 * half models,
+        # true in the upper half, doubled until it fills the block
+        column = ((1 << half) - 1) << half
+        width = 2 * half
+        while width < size:
+            column |= column << width
+            width *= 2
+        result[name] = column
+    return result, mask
+
+
+def truth_tables(sentences, symbols, chunk_bits=CHUNK_BITS):
+    """
+    Yields the values of `sentences` over all models of `symbols`, one
+    block of models at a time, together with the mask of the block.
+    """
+    bits = min(len(symbols), chunk_bits)
+    block, mask = columns(symbols, bits)
+    rest = symbols[bits:]
+    # the remaining symbols are constant within a block
+    for number in range(1 << len(rest)):
+        model = dict(block)
+        for j, name in enumerate(rest):
+            model[name] = mask if number >> j & 1 else 0
+        yield [sentence.evaluate_columns(model, mask)
+               for sentence in sentences], mask
+
+
+def entails(knowledge, query, chunk_bits=CHUNK_BITS):
+    """
+    Checks if knowledge base entails query: no model may have knowledge
+    true and query false.
+    """
+    symbols = sorted(knowledge.symbols() | query.symbols())
+    for (known, queried), mask in truth_tables([knowledge, query], symbols,
+                                                chunk_bits):
+        if known & (mask ^ queried):
+            return False
+    return True
+
+
+def entails_many(knowledge, queries, chunk_bits=CHUNK_BITS):
+    """
+    Checks which of the queries knowledge base entails, evaluating
+    knowledge only once per block of models.
+    """
+    symbols = sorted(knowledge.symbols().union(
+        *[query.symbols() for query in queries]
+    ))
+    entailed = [True] * len(queries)
+    for values, mask in truth_tables([knowledge] + queries, symbols,
+                                     chunk_bits):
+        known = values[0]
+        for i, queried in enumerate(values[1:]):
+            if known & (mask ^ queried):
+                entailed[i] = False
+    return entailed